@@ -1,18 +1,23 @@
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.templating import Jinja2Templates
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List
 import requests
 from bs4 import BeautifulSoup
-import pandas as pd
 import os # 파일 존재 여부 확인을 위해 os 모듈 임포트
 from fastapi import FastAPI, Form, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import FileResponse
 from starlette.requests import Request
+import asyncio
+import logging
+import time
+
 import httpx
-import xml.etree.ElementTree as ET
+
+from prometheus_client import CONTENT_TYPE_LATEST
 
 # summarize.py에서 정의한 라우터 가져오기
 from app.routers.summarize import (
@@ -20,49 +25,108 @@ from app.routers.summarize import (
     summarize_news,
     SummarizeRequest
 )
+from app.routers.model_runtime import load_model_runtime
+from app.routers.worker_pool import get_worker_pool, shutdown_worker_pool, summary_runtime_status
+from app.routers.summary_store import get_summary_store, close_summary_store
+from app.routers.http_client import get_http_client, close_http_client
+from app.routers.trending import get_trending_snapshot
+from app.routers.section_crawler import CRAWLER_ENABLED, get_section_crawler
+from app.routers.weather import WEATHER_DEFAULT_REGION, WeatherNotFound, get_weather_service
+from app.routers.fortune import get_fortune_index, reload_fortune_index, watch_fortune_file
+from app.routers.log_config import configure_logging
+from app.routers.metrics import METRICS_MULTIPROCESS, render_metrics, sample_queue_depths_forever
+
+# 로그 레벨은 LOG_LEVEL 환경 변수로 설정 (OFF면 로그를 남기지 않음)
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# 운세 일괄 조회 시 한 번에 받을 수 있는 최대 연도 수
+FORTUNE_BULK_MAX = int(os.environ.get("FORTUNE_BULK_MAX", "200"))
 # FastAPI 앱 인스턴스 생성
 app = FastAPI()
+# 시작 시간 측정 기준 (app.serve로 실행하면 워커를 fork한 시각으로 바뀜)
+app.state.started_at = time.perf_counter()
+app.state.startup_seconds = None
 
 # 템플릿 파일 경로 설정 (HTML 파일을 'templates' 폴더에 두었다고 가정합니다)
 templates = Jinja2Templates(directory="app/templates")
 
-# CSV 파일 경로 (main_fastapi.py 파일과 같은 폴더에 있다고 가정합니다)
-# 파일 이름은 '띠별_년생_운세수정버전.csv'입니다.
-CSV_FILE_PATH = 'app/fortune.csv'
-# 운세 데이터를 저장할 DataFrame 변수
-fortune_df = None
-
-# 앱 시작 시 CSV 파일을 로드하는 함수
-# FastAPI의 startup 이벤트를 사용하면 앱이 시작될 때 데이터를 로드할 수 있습니다.
+# 앱 시작 시 운세 CSV 파일을 출생 연도 색인으로 로드하는 함수
+# 이후 파일이 바뀌면 백그라운드 작업이 다시 읽어 색인을 교체합니다. (재시작 불필요)
 @app.on_event("startup")
 async def load_data_on_startup():
     """앱 시작 시 운세 데이터를 로드합니다."""
-    global fortune_df
-    if not os.path.exists(CSV_FILE_PATH):
-        print(f"!!! 경고: '{CSV_FILE_PATH}' 파일을 찾을 수 없습니다. 크롤링 코드를 먼저 실행하여 파일을 생성해주세요.")
-        fortune_df = pd.DataFrame()
-        return # 파일이 없으면 로드 중단
+    await asyncio.to_thread(reload_fortune_index)
+    app.state.fortune_watch_task = asyncio.create_task(watch_fortune_file())
 
-    try:
-        # CSV 파일을 DataFrame으로 읽어옵니다.
-        # header=None: CSV 파일에 헤더가 없음을 명시
-        # encoding='euc-kr': 한글 깨짐 방지를 위해 사용 (CSV 파일 인코딩에 따라 변경 가능)
-        # sep=',': 쉼표로 구분된 파일임을 명시
-        # dtype={1: int}: 1번 컬럼(년도)을 정수형으로 명시적 지정
-        fortune_df = pd.read_csv(CSV_FILE_PATH, encoding='euc-kr', sep=',', header=None, dtype={1: int})
-        # 컬럼에 알기 쉬운 이름 지정 (데이터 형식: 띠, 년도, 운세내용)
-        fortune_df.columns = ['띠', '년도', '운세내용']
-
-        print("\n--- DataFrame 정보 ---")
-        print(fortune_df.info())
-        print("\n--- DataFrame 첫 5행 ---")
-        print(fortune_df.head())
-        print("---------------------\n")
-        print(f"'{CSV_FILE_PATH}' 파일 로드 성공.")
-
-    except Exception as e:
-        print(f"!!! 오류: CSV 파일 로드 중 오류 발생: {e}")
-        fortune_df = pd.DataFrame() # 오류 발생 시 빈 DataFrame 생성
+# 앱 시작 시 KoBERT 토크나이저/모델을 한 번만 로드합니다.
+# 로드는 백그라운드 스레드에서 진행되고, 진행 상태는 /api/ready 로 확인할 수 있습니다.
+@app.on_event("startup")
+async def load_model_on_startup():
+    """앱 시작 시 요약 모델 런타임을 로드합니다."""
+    # 요약 작업용 워커 풀 생성
+    pool = get_worker_pool()
+
+    async def _load():
+        try:
+            if pool.kind == "process":
+                # 프로세스 풀이면 자식 프로세스들만 모델을 로드 (이 프로세스는 추론하지 않음)
+                await pool.warm_up()
+            else:
+                await asyncio.to_thread(load_model_runtime)
+        except Exception as e:
+            logger.error("요약 모델 로드 중 오류 발생: %s", e)
+
+    app.state.model_load_task = asyncio.create_task(_load())
+    # 요약 기록 저장소 쓰기 스레드 시작
+    get_summary_store().start()
+    # 기사/RSS 요청에 쓸 공유 HTTP 클라이언트 생성
+    get_http_client()
+    # 인기 뉴스 RSS 백그라운드 갱신 시작
+    get_trending_snapshot().start()
+    # 많이 조회된 지역의 날씨 백그라운드 갱신 시작
+    get_weather_service().start()
+    # 섹션 목록의 새 기사를 미리 요약하는 크롤러 시작 (CRAWLER_ENABLED=1일 때만)
+    if CRAWLER_ENABLED:
+        get_section_crawler().start()
+    # 여러 워커 모드에서는 대기열 길이를 주기적으로 기록해 다른 워커의 /metrics에서도 보이게 함
+    if METRICS_MULTIPROCESS:
+        app.state.metrics_task = asyncio.create_task(sample_queue_depths_forever())
+    app.state.startup_seconds = time.perf_counter() - app.state.started_at
+    logger.info("앱 시작 완료 (pid %d, %.2f초)", os.getpid(), app.state.startup_seconds)
+
+# 앱 종료 시 워커 풀 정리, 대기 중인 요약 기록 저장
+@app.on_event("shutdown")
+async def shutdown_workers():
+    await get_trending_snapshot().stop()
+    await get_weather_service().stop()
+    await get_section_crawler().stop()
+    app.state.fortune_watch_task.cancel()
+    if METRICS_MULTIPROCESS:
+        app.state.metrics_task.cancel()
+    shutdown_worker_pool()
+    await asyncio.to_thread(close_summary_store)
+    await close_http_client()
+
+# 요약 모델 준비 상태 확인 (readiness probe)
+@app.get("/api/ready")
+async def ready():
+    # 여러 워커로 실행할 때 어느 워커가 응답했는지 알 수 있도록 pid와 시작 시간을 함께 반환
+    status = {**summary_runtime_status(), "pid": os.getpid(), "startup_seconds": app.state.startup_seconds}
+    if status["state"] != "ready":
+        return JSONResponse(status_code=503, content=status)
+    return status
+
+# 단계별 소요 시간, 캐시 적중, upstream 오류, 대기열 길이 (Prometheus 텍스트 형식)
+# app.serve로 실행하면 응답한 워커와 상관없이 모든 워커의 값을 합산해서 보여줌
+@app.get("/metrics")
+async def metrics():
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+# 섹션 크롤러 상태 (확인 주기 횟수, 미리 요약한 기사 수 등)
+@app.get("/api/crawler/stats")
+async def crawler_stats():
+    return get_section_crawler().stats()
 
 # 루트 경로 - 메인 페이지 렌더링
 # FastAPI에서는 Request 객체를 사용하여 요청 정보를 받을 수 있습니다.
@@ -75,32 +139,42 @@ async def read_root(request: Request):
 # 4) 요약 API 라우터 등록
 app.include_router(summarize_router, prefix="/api")
 
-# 5) 실시간 인기 뉴스 RSS 파싱 엔드포인트
+# 5) 실시간 인기 뉴스 엔드포인트
 @app.get("/api/trending-news")
 async def trending_news(top_n: int = 5):
     """
-    JTBC 이슈 RSS 피드에서 상위 top_n개 뉴스 제목을 가져옵니다.
+    JTBC 이슈 RSS 피드의 상위 top_n개 뉴스 제목을 반환합니다.
+    RSS는 백그라운드에서 주기적으로 갱신되고, 요청은 메모리의 스냅샷에서 바로 응답합니다.
+    upstream이 실패하면 마지막으로 가져온 목록을 stale: true와 함께 돌려줍니다.
+    """
+    snapshot = get_trending_snapshot()
+    if snapshot.items is None:
+        # 앱 시작 직후 첫 갱신이 끝나지 않았다면 잠시 기다림
+        await snapshot.wait_ready()
+        if snapshot.items is None:
+            raise HTTPException(status_code=502, detail=f"RSS 호출 실패: {snapshot.last_error}")
+    return snapshot.get(top_n)
+
+# 실시간 날씨 엔드포인트
+@app.get("/api/weather")
+async def weather(region: str = Query(WEATHER_DEFAULT_REGION, min_length=1, max_length=30)):
     """
-    RSS_URL = "https://news-ex.jtbc.co.kr/v1/get/rss/issue"
+    네이버 날씨 위젯에서 region의 현재 기온과 날씨를 가져옵니다.
+    지역별로 일정 시간 캐시하고, upstream이 실패하면 마지막으로 가져온 값을 stale: true와 함께 돌려줍니다.
+    """
+    if not region.strip():
+        raise HTTPException(status_code=422, detail="지역 이름을 입력해주세요.")
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            res = await client.get(RSS_URL)
-            res.raise_for_status()
+        return await get_weather_service().get(region)
+    except WeatherNotFound:
+        raise HTTPException(status_code=404, detail=f"'{region}' 지역의 날씨 정보를 찾을 수 없습니다.")
     except httpx.HTTPError as e:
-        raise HTTPException(status_code=502, detail=f"RSS 호출 실패: {e}")
+        raise HTTPException(status_code=502, detail=f"날씨 정보 호출 실패: {e}")
 
-    try:
-        root = ET.fromstring(res.text)
-        channel = root.find("channel")
-        items = channel.findall("item") if channel is not None else []
-        trending = []
-        for item in items[:top_n]:
-            title_el = item.find("title")
-            if title_el is not None and title_el.text:
-                trending.append({"title": title_el.text})
-        return {"trending": trending}
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"RSS 파싱 실패: {e}")
+# 날씨 캐시 상태 (캐시한 지역 수, 백그라운드 갱신 횟수, 많이 조회된 지역 등)
+@app.get("/api/weather/stats")
+async def weather_stats():
+    return get_weather_service().stats()
 
 # 6) 메인 페이지 (GET /)
 @app.get("/")
@@ -123,46 +197,42 @@ async def index_post(request: Request, url: str = Form(...)):
 class FortuneRequest(BaseModel):
     birth_year: int # 출생 연도는 숫자로 받도록 명시
 
+class FortuneBulkRequest(BaseModel):
+    birth_years: List[int] = Field(..., min_length=1, max_length=FORTUNE_BULK_MAX)
+
 # 운세 검색 API 엔드포인트
 @app.post("/api/fortune")
 async def get_fortune(request_data: FortuneRequest):
     birth_year_int = request_data.birth_year # Pydantic 모델에서 자동 형변환됨
 
-    # DataFrame이 로드되지 않았거나 비어있으면 오류 반환
-    if fortune_df is None or fortune_df.empty:
-        # Flask의 500 에러에 해당
+    # 읽기는 현재 색인을 참조만 하므로 잠금이 필요 없음
+    index = get_fortune_index()
+    if len(index) == 0:
         raise HTTPException(status_code=500, detail='운세 데이터를 불러올 수 없습니다. CSV 파일을 확인해주세요.')
 
-    try:
-        # DataFrame에서 입력된 년도와 정확히 일치하는 행을 찾습니다.
-        # '년도' 컬럼이 정수형으로 로드되었다고 가정합니다.
-        found_fortunes = fortune_df[fortune_df['년도'] == birth_year_int]
-    except KeyError:
-         # 데이터 처리 오류: '년도' 컬럼을 찾을 수 없는 경우
-         raise HTTPException(status_code=500, detail="데이터 처리 오류: '년도' 컬럼을 찾을 수 없습니다.")
-    except Exception as e: # 예상치 못한 다른 pandas 관련 오류 처리
-         print(f"DataFrame 검색 중 오류 발생: {e}")
-         raise HTTPException(status_code=500, detail="운세 데이터를 검색하는 중 오류가 발생했습니다.")
-
-
-    # 검색된 결과가 있는지 확인
-    if not found_fortunes.empty:
-        try:
-            # 첫 번째로 찾은 결과 사용
-            # 컬럼 이름 '띠'와 '운세내용'을 사용하여 데이터 가져오기
-            띠 = found_fortunes.iloc[0]['띠']
-            운세 = found_fortunes.iloc[0]['운세내용']
-            # 프론트엔드에서 '운세' 키를 기대하므로, '운세내용' 값을 '운세' 키로 반환
-            return {"띠": 띠, "운세": 운세} # dict 형태로 반환하면 JSON 응답
-        except KeyError as e:
-             # '띠' 또는 '운세내용' 컬럼이 없는 경우
-             raise HTTPException(status_code=500, detail=f"데이터 형식 오류: 필요한 컬럼({e})이 CSV 파일에 없습니다.")
-        except IndexError:
-             # 데이터는 찾았지만 행이 비어있는 이상한 경우 (발생 가능성 낮음)
-             raise HTTPException(status_code=500, detail="운세 데이터를 가져오는 중 예상치 못한 오류가 발생했습니다.")
-    else:
-        # 해당 년생의 운세가 없는 경우 (Flask의 404 에러에 해당)
+    # 정확한 년도가 없으면 같은 띠의 운세로 대체
+    fortune = index.lookup(birth_year_int)
+    if fortune is None:
+        # 해당 년생의 운세가 없는 경우
         raise HTTPException(status_code=404, detail=f'{birth_year_int}년생의 운세 데이터를 찾을 수 없습니다.')
+    # 프론트엔드에서 '띠', '운세' 키를 기대
+    return fortune
+
+# 여러 출생 연도의 운세를 한 번에 조회
+@app.post("/api/fortune/bulk")
+async def get_fortune_bulk(request_data: FortuneBulkRequest):
+    index = get_fortune_index()
+    if len(index) == 0:
+        raise HTTPException(status_code=500, detail='운세 데이터를 불러올 수 없습니다. CSV 파일을 확인해주세요.')
+
+    results = []
+    for birth_year in request_data.birth_years:
+        fortune = index.lookup(birth_year)
+        if fortune is None:
+            results.append({"birth_year": birth_year, "error": f'{birth_year}년생의 운세 데이터를 찾을 수 없습니다.'})
+        else:
+            results.append({"birth_year": birth_year, **fortune})
+    return {"results": results}
 
 # 참고: FastAPI는 uvicorn으로 실행합니다. 아래 코드는 직접 실행 시 uvicorn 서버를 시작합니다.
 # if __name__ == '__main__':
@@ -0,0 +1,104 @@
+# embedding_batcher.py
+# 동시에 들어온 요약 요청들의 문장을 모아 한 번의 배치로 임베딩하는 마이크로 배치 스케줄러
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from .metrics import track_queue_depth
+from .model_runtime import get_model_runtime
+
+# 한 번의 forward에 넣을 최대 문장 수
+EMBED_MAX_BATCH_SIZE = int(os.environ.get("EMBED_MAX_BATCH_SIZE", "32"))
+# 다른 요청의 문장을 기다리는 최대 시간 (밀리초)
+EMBED_MAX_WAIT_MS = float(os.environ.get("EMBED_MAX_WAIT_MS", "5"))
+
+
+class EmbeddingBatcher:
+    """
+    embed()로 들어온 문장 목록들을 큐에 쌓아 두었다가,
+    max_batch_size가 차거나 max_wait_ms가 지나면 한 번에 모델에 넣습니다.
+    결과는 요청별 Future로 나눠서 돌려줍니다.
+    """
+
+    def __init__(self, max_batch_size: int = EMBED_MAX_BATCH_SIZE, max_wait_ms: float = EMBED_MAX_WAIT_MS):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        track_queue_depth("embedding_batcher", self._queue.qsize)
+
+    def _ensure_started(self):
+        # fork 이후에도 안전하도록 워커 스레드는 처음 사용할 때 시작
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, sentences) -> Future:
+        """문장 목록을 큐에 넣고, 임베딩 배열을 돌려줄 Future를 반환합니다."""
+        future = Future()
+        if not sentences:
+            hidden_size = get_model_runtime().model.config.hidden_size
+            future.set_result(np.zeros((0, hidden_size), dtype=np.float32))
+            return future
+        self._ensure_started()
+        self._queue.put((list(sentences), future))
+        return future
+
+    def embed(self, sentences):
+        """문장 목록을 임베딩할 때까지 기다렸다가 (문장 수, hidden) 배열을 반환합니다."""
+        return self.submit(sentences).result()
+
+    def _collect(self):
+        # 첫 작업이 들어올 때까지 대기한 뒤, 남은 시간 동안 다른 요청의 작업을 모읍니다.
+        jobs = [self._queue.get()]
+        total = len(jobs[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while total < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            jobs.append(job)
+            total += len(job[0])
+        return jobs
+
+    def _run(self):
+        while True:
+            jobs = self._collect()
+            sentences = [sent for job_sentences, _ in jobs for sent in job_sentences]
+            try:
+                embeddings = get_model_runtime().encode(sentences, batch_size=self.max_batch_size)
+            except Exception as e:
+                for _, future in jobs:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for job_sentences, future in jobs:
+                future.set_result(embeddings[offset:offset + len(job_sentences)])
+                offset += len(job_sentences)
+
+
+# 프로세스 전역 배처
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = EmbeddingBatcher()
+    return _batcher
@@ -0,0 +1,231 @@
+# embedding_cache.py
+# 문장 임베딩 캐시 (메모리 LRU + NumPy memmap 기반 디스크 벡터 저장소)
+# 앵커 멘트, 기자 클로징처럼 기사마다 반복되는 문장은 다시 임베딩하지 않습니다.
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# 디스크 벡터 저장소 폴더 (비워 두면 메모리 캐시만 사용)
+EMBED_CACHE_DIR = os.environ.get("EMBED_CACHE_DIR", "")
+# 디스크에 저장할 최대 벡터 수 (가득 차면 가장 오래된 자리부터 덮어씀)
+EMBED_CACHE_CAPACITY = int(os.environ.get("EMBED_CACHE_CAPACITY", "50000"))
+# 메모리에 올려 둘 최대 벡터 수
+EMBED_CACHE_MEMORY_ENTRIES = int(os.environ.get("EMBED_CACHE_MEMORY_ENTRIES", "10000"))
+
+_whitespace_re = re.compile(r"\s+")
+
+
+def sentence_key(sentence: str, namespace: str = "") -> str:
+    """공백을 정규화한 문장 텍스트의 해시 키를 반환합니다. (모델이 다르면 namespace로 구분)"""
+    normalized = _whitespace_re.sub(" ", sentence).strip()
+    return hashlib.blake2b(f"{namespace}\x00{normalized}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _row_tag(key: str) -> int:
+    """행에 함께 기록해 두는 키 확인용 값 (0은 비어 있거나 쓰는 중인 행)"""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+
+class MemmapVectorStore:
+    """
+    고정 크기 memmap 파일에 벡터를 저장하고, 키 -> 행 번호 색인은 SQLite에 둡니다.
+    여러 워커 프로세스가 같은 파일을 MAP_SHARED로 열기 때문에 페이지 캐시를 공유합니다.
+    색인을 읽은 뒤 다른 프로세스가 그 행을 덮어쓸 수 있으므로, 행마다 키 확인용 값(tag)을 함께 두고
+    읽을 때 복사본의 앞뒤로 tag를 확인해 다른 키의 벡터를 돌려주지 않습니다.
+    """
+
+    def __init__(self, directory: str, dim: int, capacity: int = EMBED_CACHE_CAPACITY):
+        self.directory = directory
+        self.dim = dim
+        self.capacity = capacity
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, f"vectors_{dim}.f32")
+        self.tags_path = os.path.join(directory, f"tags_{dim}.u64")
+        self.index_path = os.path.join(directory, f"index_{dim}.sqlite")
+        self._lock = threading.Lock()
+        self._pid = None
+        self._open()
+
+    def _open(self):
+        # fork 이후에는 부모의 SQLite 연결을 쓰지 않도록 프로세스마다 다시 엶
+        mode = "r+" if os.path.exists(self.vectors_path) else "w+"
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode=mode, shape=(self.capacity, self.dim))
+        # tag 파일이 없던 저장소라면 모든 행이 0(빈 행)으로 시작하므로 기존 벡터는 다시 계산됨
+        mode = "r+" if os.path.exists(self.tags_path) else "w+"
+        self.tags = np.memmap(self.tags_path, dtype=np.uint64, mode=mode, shape=(self.capacity,))
+        self._conn = sqlite3.connect(self.index_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_row ON entries (row)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('next_row', 0)")
+        self._pid = os.getpid()
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            self._open()
+
+    def _read_row(self, key: str, row: int):
+        # 복사 전후 tag가 모두 이 키일 때만 사용 (그 사이에 덮어쓰기가 시작됐으면 tag가 바뀌어 있음)
+        tag = _row_tag(key)
+        if int(self.tags[row]) != tag:
+            return None
+        vector = np.array(self.vectors[row], dtype=np.float32, copy=True)
+        if int(self.tags[row]) != tag:
+            return None
+        return vector
+
+    def get_many(self, keys):
+        """키 목록에 해당하는 벡터(복사본)를 반환합니다. 없거나 덮어써진 키는 None"""
+        if not keys:
+            return []
+        with self._lock:
+            self._check_pid()
+            placeholders = ",".join("?" * len(keys))
+            rows = dict(self._conn.execute(
+                f"SELECT key, row FROM entries WHERE key IN ({placeholders})", list(keys)
+            ).fetchall())
+        return [self._read_row(key, rows[key]) if key in rows else None for key in keys]
+
+    def put_many(self, keys, vectors):
+        """벡터를 저장합니다. 행 할당과 색인 갱신은 한 트랜잭션에서 처리합니다."""
+        if not keys:
+            return
+        with self._lock:
+            self._check_pid()
+            conn = self._conn
+            # 다른 프로세스와 행 번호가 겹치지 않도록 쓰기 잠금을 먼저 잡음
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                next_row = conn.execute("SELECT value FROM meta WHERE name = 'next_row'").fetchone()[0]
+                for key, vector in zip(keys, vectors):
+                    row = next_row
+                    next_row = (next_row + 1) % self.capacity
+                    # 덮어쓸 자리에 있던 기존 항목은 색인에서 제거
+                    conn.execute("DELETE FROM entries WHERE row = ?", (row,))
+                    conn.execute("INSERT OR REPLACE INTO entries (key, row) VALUES (?, ?)", (key, row))
+                    # 커밋 전이라 다른 프로세스는 아직 기존 색인으로 이 행을 읽을 수 있음
+                    # tag를 먼저 지워 읽는 쪽이 쓰는 중인 행을 버리게 하고, 벡터를 다 쓴 뒤 새 tag를 기록
+                    self.tags[row] = 0
+                    self.vectors[row] = vector
+                    self.tags[row] = _row_tag(key)
+                conn.execute("UPDATE meta SET value = ? WHERE name = 'next_row'", (next_row,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def __len__(self):
+        with self._lock:
+            self._check_pid()
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+class EmbeddingCache:
+    """문장 해시 -> 임베딩 벡터 캐시. 메모리 LRU를 먼저 보고, 없으면 디스크 저장소를 봅니다."""
+
+    def __init__(self, namespace: str, store: MemmapVectorStore = None,
+                 max_memory_entries: int = EMBED_CACHE_MEMORY_ENTRIES):
+        self.namespace = namespace
+        self.store = store
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, key, vector):
+        # 디스크 행은 나중에 다른 벡터로 덮어써질 수 있으므로 메모리에는 복사본을 둠
+        self._memory[key] = np.array(vector, dtype=np.float32, copy=True)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, sentences):
+        """문장 목록의 캐시된 벡터를 반환합니다. 캐시에 없는 문장은 None"""
+        keys = [sentence_key(sent, self.namespace) for sent in sentences]
+        found = [None] * len(keys)
+        disk_lookup = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[i] = vector
+                else:
+                    disk_lookup.append(i)
+
+        if disk_lookup and self.store is not None:
+            vectors = self.store.get_many([keys[i] for i in disk_lookup])
+            with self._lock:
+                for i, vector in zip(disk_lookup, vectors):
+                    if vector is not None:
+                        found[i] = vector
+                        self._remember(keys[i], vector)
+
+        with self._lock:
+            hit_count = sum(vector is not None for vector in found)
+            self.hits += hit_count
+            self.misses += len(found) - hit_count
+        # 프로세스 풀 작업 안이면 작업이 끝난 뒤 부모 프로세스에서 기록
+        record_cache_lookup("embedding", "hit", hit_count)
+        record_cache_lookup("embedding", "miss", len(found) - hit_count)
+        return found
+
+    def put_many(self, sentences, vectors):
+        # 같은 문장이 여러 번 들어오면 한 번만 저장
+        unique = {}
+        for sent, vector in zip(sentences, vectors):
+            unique[sentence_key(sent, self.namespace)] = vector
+        keys, vectors = list(unique.keys()), list(unique.values())
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._remember(key, vector)
+        if self.store is not None:
+            try:
+                self.store.put_many(keys, vectors)
+            except sqlite3.Error as e:
+                logger.error("임베딩 캐시 디스크 저장 중 오류 발생: %s", e)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "pid": os.getpid(),
+            "namespace": self.namespace,
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self.store) if self.store is not None else 0,
+            "disk_capacity": self.store.capacity if self.store is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# 프로세스 전역 임베딩 캐시 (모델이 로드된 뒤 처음 사용할 때 생성)
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache(namespace: str, dim: int) -> EmbeddingCache:
+    global _cache
+    if _cache is None or _cache.namespace != namespace:
+        with _cache_lock:
+            if _cache is None or _cache.namespace != namespace:
+                store = MemmapVectorStore(EMBED_CACHE_DIR, dim) if EMBED_CACHE_DIR else None
+                _cache = EmbeddingCache(namespace, store=store)
+    return _cache
+
+
+def embedding_cache_stats():
+    return _cache.stats() if _cache is not None else None
@@ -0,0 +1,265 @@
+# extractors.py
+# 기사 HTML에서 제목/본문/카테고리를 뽑아내는 언론사별 어댑터 모음
+# 카테고리 표와 정규식은 import 시점에 한 번만 만들어 두고 요청마다 재사용합니다.
+import logging
+import os
+import re
+from abc import ABC, abstractmethod
+from urllib.parse import urlparse, parse_qs
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from .metrics import stage
+
+logger = logging.getLogger(__name__)
+
+# 빠른 lxml 파서를 우선 사용하고, 설치돼 있지 않으면 내장 html.parser 사용
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# 가져온 HTML을 저장할 디버깅 폴더 (비워 두면 저장하지 않음)
+ARTICLE_DEBUG_DUMP_DIR = os.environ.get("ARTICLE_DEBUG_DUMP_DIR", "")
+
+# 본문 추출 실패 시 채워지는 값
+TITLE_EXTRACTION_FAILED = "제목 추출 실패"
+BODY_EXTRACTION_FAILED = "본문 추출 실패"
+BODY_EMPTY = "본문 내용 없음"
+CATEGORY_PATTERN_MISMATCH = "카테고리 분류 실패 (URL 패턴 불일치)"
+
+_debug_file_name_re = re.compile(r'[^\w.-]')
+
+
+def dump_debug_html(url: str, html_content: str):
+    """ARTICLE_DEBUG_DUMP_DIR이 설정된 경우에만 가져온 HTML을 파일로 저장합니다."""
+    if not ARTICLE_DEBUG_DUMP_DIR:
+        return
+    file_name_safe = _debug_file_name_re.sub('_', urlparse(url).path.strip('/')).strip('_')
+    if not file_name_safe:
+        file_name_safe = urlparse(url).hostname or 'debug'
+    debug_file_path = os.path.join(ARTICLE_DEBUG_DUMP_DIR, f"debug_ytn_html_{file_name_safe}.html")
+    try:
+        os.makedirs(ARTICLE_DEBUG_DUMP_DIR, exist_ok=True)
+        with open(debug_file_path, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+    except Exception as file_error:
+        logger.warning("디버깅: HTML 파일 저장 중 오류 발생: %s", file_error)
+
+
+class ArticleAdapter(ABC):
+    """
+    언론사별 기사 추출 어댑터의 기본 클래스입니다.
+    hosts에 담당할 호스트(접두어 www./m. 제외)를 적고 extract()를 구현합니다.
+    extract()를 구현하지 않은 어댑터는 만들 때 TypeError가 발생합니다.
+    """
+
+    name = "base"
+    hosts = ()
+
+    @abstractmethod
+    def extract(self, url: str, html_content) -> dict:
+        """{'URL', '제목', '본문', '카테고리'} dict를 반환합니다."""
+
+
+# --- YTN 메인 메뉴 HTML 스니펫 (제공해주신 내용) ---
+# 이 HTML을 파싱하여 카테고리 맵을 생성합니다.
+YTN_MENU_HTML_SNIPPET = """
+                    <ul class="menu">
+                        <li class="YTN_CSA_mainpolitics menu_election2025">
+                            <a href="https://www.ytn.co.kr/issue/election2025">대선2025</a>
+                        </li>
+                        <li class="YTN_CSA_mainpolitics ">
+                            <a href="https://www.ytn.co.kr/news/list.php?mcd=0101">정치</a>
+                        </li>
+                        <li class="YTN_CSA_maineconomy ">
+                            <a href="https://www.ytn.co.kr/news/list.php?mcd=0102">경제</a>
+                        </li>
+                        <li class="YTN_CSA_mainsociety ">
+                            <a href="https://www.ytn
+                            .co.kr/news/list.php?mcd=0103">사회</a>
+                        </li>
+                        <li class="YTN_CSA_mainnationwide ">
+                            <a href="https://www.ytn.co.kr/news/list.php?mcd=0115">전국</a>
+                        </li>
+                        <li class="YTN_CSA_mainglobal ">
+                            <a href="https://www.ytn.co.kr/news/list.php?mcd=0104">국제</a>
+                        </li>
+                        <li class="YTN_CSA_mainscience ">
+                            <a href="https://www.ytn.co.kr/news/list.php?mcd=0105">과학</a>
+                        </li>
+                        <li class="YTN_CSA_mainculture ">
+                            <a href="https://www.ytn.co.kr/news/list.php?mcd=0106">문화</a>
+                        </li>
+                        <li class="YTN_CSA_mainsports ">
+                            <a href="https://www.ytn.co.kr/news/list.php?mcd=0107">스포츠</a>
+                        </li>
+                        <li class="YTN_CSA_mainphoto ">
+                            <a href="https://star.ytn.co.kr">연예</a>
+                        </li>
+                        <li class="YTN_CSA_maingame ">
+                            <!--<a href="https://game.ytn.co.kr/news/list.php?mcd=0135">게임</a>-->
+                            <a href="https://game.ytn.co.kr">게임</a>
+                        </li>
+                        <li class="YTN_CSA_mainweather ">
+                            <a href="https://www.ytn.co.kr/weather/list_weather.php">날씨</a>
+                        </li>
+                        <li class="YTN_CSA_mainissue ">
+                            <a href="https://www.ytn.co.kr/news/main_issue.html">이슈</a>
+                        </li>
+                        <li class="YTN_CSA_mainyp ">
+                            <a href="https://www.ytn.co.kr/news/main_yp.html">시리즈</a>
+                        </li>
+                        <li class="YTN_CSA_mainreplay "><a href="https://www.ytn.co.kr/replay/main.html">TV프로그램</a></li>
+                    </ul>
+    """
+
+
+def build_ytn_category_map(menu_html: str = YTN_MENU_HTML_SNIPPET) -> dict:
+    """메뉴 HTML에서 mcd 코드 -> 카테고리 이름 맵을 만듭니다."""
+    ytn_menu_soup = BeautifulSoup(menu_html, 'html.parser')
+    category_map = {}
+    for link in ytn_menu_soup.select('ul.menu a'):
+        href = link.get('href')
+        text = link.get_text(strip=True)
+        if href and text:
+            parsed_url = urlparse(href)
+            # URL 경로가 '/news/list.php'이고 쿼리 스트링에 'mcd' 파라미터가 있는 경우
+            if parsed_url.path == '/news/list.php' and parsed_url.query:
+                query_params = parse_qs(parsed_url.query)
+                if 'mcd' in query_params and query_params['mcd'][0]:
+                    category_map[query_params['mcd'][0]] = text
+    return category_map
+
+
+# mcd 코드 -> 카테고리 이름 (예: '0101' -> '정치')
+YTN_CATEGORY_MAP = build_ytn_category_map()
+
+# YTN 기사 하단부 정리용 정규식
+_ytn_reporter_re = re.compile(r'YTN\s*[^(\n)]+\s*\([^@]+\@[^)]+\)\s*\n*', flags=re.MULTILINE)
+_ytn_mail_re = re.compile(r'※\s*.*?\[메일\].*?\n*', flags=re.DOTALL)
+_ytn_copyright_re = re.compile(r'\[저작권자\(c\).+?\]\n*')
+_blank_lines_re = re.compile(r'\n\s*\n')
+
+# 제목(h2.news_title)과 본문(div#CmAdContent.paragraph) 부분만 파싱
+_ytn_strainer = SoupStrainer(['h2', 'div'], attrs={'class': ['news_title', 'paragraph']})
+
+
+class YTNAdapter(ArticleAdapter):
+    """YTN 기사 추출 어댑터"""
+
+    name = "ytn"
+    hosts = ("ytn.co.kr",)
+
+    def __init__(self, category_map: dict = None):
+        self.category_map = category_map if category_map is not None else YTN_CATEGORY_MAP
+
+    def classify_category(self, url: str) -> str:
+        """
+        YTN 기사 URL 경로를 분석하여 카테고리 코드를 추출하고 맵핑된 카테고리 이름을 반환합니다.
+        """
+        try:
+            path_segments = urlparse(url).path.split('/')  # 예: '/_ln/0103_202505111017133914'
+            if '_ln' in path_segments:
+                ln_index = path_segments.index('_ln')
+                if ln_index + 1 < len(path_segments):
+                    # 예: '0103_202505111017133914' -> 첫 번째 '_' 이전 부분이 카테고리 코드
+                    code_segment = path_segments[ln_index + 1]
+                    code = code_segment.split('_')[0]
+                    return self.category_map.get(code, f"알 수 없는 카테고리 코드: {code}")
+        except Exception as e:
+            logger.warning("URL [%s] 카테고리 분석 중 오류 발생: %s", url, e)
+
+        # 일치하는 패턴을 찾지 못하거나 오류 발생 시
+        return CATEGORY_PATTERN_MISMATCH
+
+    def clean_body(self, news_body_raw: str) -> str:
+        """YTN 기사 하단부(기자 이메일, 제보 안내, 저작권 문구)를 제거합니다."""
+        cleaned_body = _ytn_reporter_re.sub('', news_body_raw)
+        cleaned_body = _ytn_mail_re.sub('', cleaned_body)
+        cleaned_body = _ytn_copyright_re.sub('', cleaned_body)
+        return _blank_lines_re.sub('\n\n', cleaned_body).strip()
+
+    def extract(self, url: str, html_content) -> dict:
+        news_title = TITLE_EXTRACTION_FAILED
+        news_body = BODY_EXTRACTION_FAILED
+        news_category = self.classify_category(url)
+
+        if html_content is None:
+            # 요청 실패 시 제목, 본문은 초기 실패 값 유지
+            return {'URL': url, '제목': news_title, '본문': news_body, '카테고리': news_category}
+
+        try:
+            dump_debug_html(url, html_content)
+            soup = BeautifulSoup(html_content, HTML_PARSER, parse_only=_ytn_strainer)
+
+            # --- 뉴스 제목 추출: h2.news_title > span, 없으면 h2 텍스트 ---
+            title_element_h2 = soup.find('h2', class_='news_title')
+            if title_element_h2:
+                title_element_span = title_element_h2.find('span')
+                if title_element_span:
+                    news_title = title_element_span.get_text(strip=True)
+                else:
+                    news_title = title_element_h2.get_text(strip=True) or news_title
+            else:
+                logger.warning("URL %s: 제목 요소를 찾지 못했습니다. (예상 선택자: h2.news_title)", url)
+
+            # --- 뉴스 본문 추출: div#CmAdContent.paragraph ---
+            body_container = soup.find('div', id='CmAdContent', class_='paragraph')
+            if body_container:
+                # 불필요한 요소 (예: iframe 광고, 이미지 등) 제거
+                for unnecessary_tag in body_container.find_all(['iframe', 'figure']):
+                    unnecessary_tag.extract()
+                news_body = self.clean_body(body_container.get_text(separator='\n', strip=True))
+                if not news_body:
+                    logger.warning("URL %s: 본문 컨테이너는 찾았으나, 유효한 텍스트 내용이 없습니다 (정리 후 빈 내용).", url)
+                    news_body = BODY_EMPTY
+            else:
+                logger.warning("URL %s: 본문 전체 컨테이너 요소를 찾지 못했습니다. (예상 선택자: div#CmAdContent.paragraph)", url)
+        except Exception as e:
+            logger.exception("URL %s: 데이터 처리 중 예외 발생: %s", url, e)
+
+        return {'URL': url, '제목': news_title, '본문': news_body, '카테고리': news_category}
+
+
+# --- 어댑터 레지스트리 ---
+_adapters = {}
+# 등록된 호스트에 해당하지 않는 URL에 사용할 어댑터
+_default_adapter = None
+
+
+def register_adapter(adapter: ArticleAdapter, default: bool = False):
+    """어댑터를 등록합니다. default=True면 등록되지 않은 호스트의 기본 어댑터로도 사용합니다."""
+    global _default_adapter
+    if not isinstance(adapter, ArticleAdapter):
+        raise TypeError(f"ArticleAdapter 인스턴스만 등록할 수 있습니다: {adapter!r}")
+    for host in adapter.hosts:
+        _adapters[host.lower()] = adapter
+    if default or _default_adapter is None:
+        _default_adapter = adapter
+
+
+def get_adapter(url: str) -> ArticleAdapter:
+    """URL 호스트에 맞는 어댑터를 반환합니다. (서브도메인은 상위 도메인 어댑터 사용)"""
+    host = (urlparse(url).hostname or "").lower()
+    while host:
+        adapter = _adapters.get(host)
+        if adapter is not None:
+            return adapter
+        # 'www.ytn.co.kr' -> 'ytn.co.kr' -> 'co.kr' ...
+        _, _, host = host.partition('.')
+    return _default_adapter
+
+
+def extract_article(url: str, html_content) -> dict:
+    """
+    기사 HTML에서 제목, 본문, 카테고리를 추출해 dict로 반환합니다.
+    html_content가 None이면(가져오기 실패) 실패 값이 채워진 dict를 반환합니다.
+    """
+    with stage("parse"):
+        return get_adapter(url).extract(url, html_content)
+
+
+# 지금까지는 모든 URL을 YTN 구조로 처리했으므로 YTN 어댑터를 기본으로 등록
+register_adapter(YTNAdapter(), default=True)
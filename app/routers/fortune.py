@@ -0,0 +1,117 @@
+# fortune.py
+# 띠별 운세 데이터(fortune.csv)를 출생 연도 색인으로 만들어 두고, 파일이 바뀌면 다시 읽어 교체합니다.
+import asyncio
+import csv
+import logging
+import os
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+# 운세 CSV 파일 경로 (데이터 형식: 띠, 년도, 운세내용 / 헤더 없음, euc-kr)
+FORTUNE_CSV_PATH = os.environ.get("FORTUNE_CSV_PATH", "app/fortune.csv")
+FORTUNE_CSV_ENCODING = os.environ.get("FORTUNE_CSV_ENCODING", "euc-kr")
+# 파일 변경 여부를 확인하는 주기 (초)
+FORTUNE_RELOAD_INTERVAL = float(os.environ.get("FORTUNE_RELOAD_INTERVAL", "5"))
+
+# (출생 연도 - 4) % 12 순서의 띠 (예: 1936년 = 쥐띠)
+ZODIAC_ANIMALS = ("쥐띠", "소띠", "호랑이띠", "토끼띠", "용띠", "뱀띠",
+                  "말띠", "양띠", "원숭이띠", "닭띠", "개띠", "돼지띠")
+
+
+def zodiac_of(year: int) -> str:
+    """출생 연도의 띠를 계산합니다."""
+    return ZODIAC_ANIMALS[(year - 4) % 12]
+
+
+class FortuneIndex:
+    """
+    한 번 만들면 바뀌지 않는 운세 색인입니다.
+    - by_year: 년도 -> (띠, 운세내용)
+    - by_zodiac: 띠 -> 그 띠에 해당하는 년도들 (정확한 년도가 없을 때 대체용)
+    """
+
+    def __init__(self, rows, mtime: float = None):
+        by_year = {}
+        by_zodiac = {}
+        for 띠, 년도, 운세 in rows:
+            # 같은 년도가 여러 번 나오면 첫 번째 행 사용 (기존 동작과 동일)
+            if 년도 not in by_year:
+                by_year[년도] = (띠, 운세)
+                by_zodiac.setdefault(띠, []).append(년도)
+        self.by_year = MappingProxyType(by_year)
+        self.by_zodiac = MappingProxyType({띠: tuple(sorted(years)) for 띠, years in by_zodiac.items()})
+        self.mtime = mtime
+
+    def __len__(self):
+        return len(self.by_year)
+
+    def lookup(self, birth_year: int):
+        """
+        출생 연도의 운세를 {"띠", "운세", "fallback"} 형태로 반환합니다.
+        정확한 년도가 없으면 같은 띠 중 가장 가까운 년도의 운세를 쓰고 fallback=True로 표시합니다.
+        같은 띠 데이터도 없으면 None을 반환합니다.
+        """
+        found = self.by_year.get(birth_year)
+        if found is not None:
+            return {"띠": found[0], "운세": found[1], "fallback": False}
+
+        years = self.by_zodiac.get(zodiac_of(birth_year))
+        if not years:
+            return None
+        nearest = min(years, key=lambda year: abs(year - birth_year))
+        띠, 운세 = self.by_year[nearest]
+        return {"띠": 띠, "운세": 운세, "fallback": True}
+
+
+def load_fortune_index(path: str = FORTUNE_CSV_PATH) -> FortuneIndex:
+    """CSV 파일을 읽어 새 색인을 만듭니다. 파일 형식이 잘못되면 ValueError를 발생시킵니다."""
+    mtime = os.stat(path).st_mtime
+    rows = []
+    with open(path, encoding=FORTUNE_CSV_ENCODING, newline="") as f:
+        for line_no, row in enumerate(csv.reader(f), start=1):
+            if not row:
+                continue
+            if len(row) < 3:
+                raise ValueError(f"{line_no}번째 줄의 컬럼 수가 부족합니다: {row}")
+            rows.append((row[0].strip(), int(row[1]), row[2].strip()))
+    return FortuneIndex(rows, mtime=mtime)
+
+
+# 현재 사용 중인 색인. 읽을 때는 잠금 없이 참조만 하고, 다시 읽을 때는 통째로 교체합니다.
+_index = FortuneIndex([])
+
+
+def get_fortune_index() -> FortuneIndex:
+    return _index
+
+
+def reload_fortune_index(path: str = FORTUNE_CSV_PATH) -> bool:
+    """파일을 다시 읽어 색인을 교체합니다. 실패하면 기존 색인을 유지하고 False를 반환합니다."""
+    global _index
+    if not os.path.exists(path):
+        logger.warning("'%s' 파일을 찾을 수 없습니다. 크롤링 코드를 먼저 실행하여 파일을 생성해주세요.", path)
+        return False
+    try:
+        new_index = load_fortune_index(path)
+    except Exception as e:
+        logger.error("CSV 파일 로드 중 오류 발생: %s", e)
+        return False
+    _index = new_index
+    logger.info("'%s' 파일 로드 성공 (%d개 년도).", path, len(new_index))
+    return True
+
+
+async def watch_fortune_file(path: str = FORTUNE_CSV_PATH, interval: float = FORTUNE_RELOAD_INTERVAL):
+    """파일 수정 시각이 바뀌면 백그라운드 스레드에서 다시 읽어 색인을 교체합니다."""
+    last_seen = _index.mtime
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            continue
+        # 읽기에 실패한 파일은 다시 바뀔 때까지 재시도하지 않음
+        if mtime != last_seen:
+            last_seen = mtime
+            await asyncio.to_thread(reload_fortune_index, path)
@@ -0,0 +1,177 @@
+# http_client.py
+# 앱 전체에서 공유하는 비동기 HTTP 클라이언트 (keep-alive 커넥션 풀 + 재시도 + 조건부 요청)
+import asyncio
+import os
+import random
+import sys
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+import httpx
+
+from .metrics import UPSTREAM_ERRORS
+
+# 타임아웃 설정 (초)
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+# 커넥션 풀 크기
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("HTTP_MAX_KEEPALIVE", "20"))
+# 재시도 횟수와 백오프 기본 대기 시간 (초)
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.environ.get("HTTP_BACKOFF", "0.3"))
+# ETag/Last-Modified를 기억할 최대 URL 수
+HTTP_VALIDATOR_CACHE_SIZE = int(os.environ.get("HTTP_VALIDATOR_CACHE_SIZE", "1024"))
+# 304 응답에 돌려줄 본문까지 함께 기억하므로 전체 크기(바이트)도 제한 (app.serve로 실행하면 워커마다 따로 사용)
+HTTP_VALIDATOR_CACHE_MAX_BYTES = int(os.environ.get("HTTP_VALIDATOR_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# 재시도할 응답 상태 코드
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+def _error_reason(status_code: int) -> str:
+    # 상태 코드별로 라벨을 나누지 않고 429 / 4xx / 5xx로만 구분
+    if status_code == 429:
+        return "http_429"
+    return "http_5xx" if status_code >= 500 else "http_4xx"
+
+
+def _http2_available() -> bool:
+    # HTTP/2는 h2 패키지가 설치된 경우에만 사용
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class FetchResult(NamedTuple):
+    text: str
+    status_code: int
+    not_modified: bool  # 304 응답이라 저장해 둔 본문을 돌려준 경우 True
+
+
+class ValidatorCache:
+    """URL별 ETag/Last-Modified와 마지막 본문을 기억하는 LRU (조건부 GET용, 항목 수와 전체 크기 한도)"""
+
+    def __init__(self, max_entries: int = HTTP_VALIDATOR_CACHE_SIZE,
+                 max_bytes: int = HTTP_VALIDATOR_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # url -> (etag, last_modified, text, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, url: str):
+        with self._lock:
+            item = self._data.get(url)
+            if item is not None:
+                self._data.move_to_end(url)
+            return item
+
+    def put(self, url: str, etag: Optional[str], last_modified: Optional[str], text: str):
+        if not etag and not last_modified:
+            return
+        # 본문이 차지하는 실제 메모리 크기 (한글 페이지는 글자당 2바이트)
+        size = sys.getsizeof(text)
+        with self._lock:
+            old = self._data.pop(url, None)
+            if old is not None:
+                self._bytes -= old[3]
+            # 한도보다 큰 페이지는 기억하지 않음 (다음에도 전체를 다시 받음)
+            if size > self.max_bytes:
+                return
+            self._data[url] = (etag, last_modified, text, size)
+            self._bytes += size
+            # 오래 사용하지 않은 항목부터 제거
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= evicted[3]
+
+
+class HttpClient:
+    """
+    httpx.AsyncClient 하나를 앱 수명 동안 재사용합니다.
+    - keep-alive 커넥션 풀, 가능하면 HTTP/2 사용
+    - 연결 오류/5xx/429 응답은 지수 백오프로 재시도
+    - 이전 응답의 ETag/Last-Modified로 조건부 요청을 보내고, 304면 저장해 둔 본문 반환
+    """
+
+    def __init__(self):
+        self.http2 = _http2_available()
+        self.client = httpx.AsyncClient(
+            http2=self.http2,
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                                max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+            follow_redirects=True,
+        )
+        self.validators = ValidatorCache()
+
+    async def _get_with_retry(self, url: str, headers: dict) -> httpx.Response:
+        for attempt in range(HTTP_RETRIES + 1):
+            try:
+                response = await self.client.get(url, headers=headers)
+                if response.status_code >= 400:
+                    UPSTREAM_ERRORS.labels(_error_reason(response.status_code)).inc()
+                if response.status_code not in RETRY_STATUS_CODES or attempt == HTTP_RETRIES:
+                    return response
+            except httpx.TransportError as e:
+                UPSTREAM_ERRORS.labels("timeout" if isinstance(e, httpx.TimeoutException) else "transport").inc()
+                if attempt == HTTP_RETRIES:
+                    raise
+            # 지수 백오프 + 지터
+            await asyncio.sleep(HTTP_BACKOFF * (2 ** attempt) * (0.5 + random.random()))
+
+    async def fetch(self, url: str, headers: dict = None, conditional: bool = True) -> FetchResult:
+        """
+        url을 GET으로 가져옵니다. 실패 시 httpx.HTTPError를 발생시킵니다.
+        conditional=True면 저장해 둔 ETag/Last-Modified로 조건부 요청을 보냅니다.
+        """
+        request_headers = dict(headers or {})
+        cached = self.validators.get(url) if conditional else None
+        if cached is not None:
+            etag, last_modified, _, _ = cached
+            if etag:
+                request_headers["If-None-Match"] = etag
+            if last_modified:
+                request_headers["If-Modified-Since"] = last_modified
+
+        response = await self._get_with_retry(url, request_headers)
+        if response.status_code == 304 and cached is not None:
+            return FetchResult(cached[2], 304, True)
+        response.raise_for_status()
+
+        text = response.text
+        if conditional:
+            self.validators.put(url, response.headers.get("ETag"), response.headers.get("Last-Modified"), text)
+        return FetchResult(text, response.status_code, False)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+# 앱 전역 HTTP 클라이언트
+_client = None
+
+
+def get_http_client() -> HttpClient:
+    global _client
+    if _client is None:
+        _client = HttpClient()
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
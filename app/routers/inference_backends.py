@@ -0,0 +1,251 @@
+# inference_backends.py
+# KoBERT 문장 임베딩 추론 백엔드 (PyTorch fp32 / PyTorch 동적 int8 양자화 / ONNX Runtime)
+#
+# 정확도 확인:
+#   python -m app.routers.inference_backends --backend torch-int8
+# 기준(fp32)과 후보 백엔드로 고정 말뭉치를 요약해 상위 문장 선택이 얼마나 같은지 비교합니다.
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 사용할 백엔드 이름 ("torch", "torch-int8", "onnx")
+SUMMARY_BACKEND = os.environ.get("SUMMARY_BACKEND", "torch")
+# 연산 내부/연산 간 스레드 수 (0이면 라이브러리 기본값)
+SUMMARY_INTRA_OP_THREADS = int(os.environ.get("SUMMARY_INTRA_OP_THREADS", "0"))
+SUMMARY_INTER_OP_THREADS = int(os.environ.get("SUMMARY_INTER_OP_THREADS", "0"))
+# ONNX 모델 파일을 저장할 폴더 (없으면 처음 로드할 때 PyTorch 모델에서 내보냄)
+ONNX_MODEL_DIR = os.environ.get("ONNX_MODEL_DIR", "onnx_models")
+# 내보내기 opset과 내보내기 코드 버전 (입출력 이름, 가변 축 등을 바꾸면 올림). 둘 다 파일 이름에 들어감
+ONNX_OPSET = 17
+ONNX_EXPORT_REVISION = 1
+
+# 정확도 확인용 고정 말뭉치
+ACCURACY_CORPUS_PATH = os.path.join(os.path.dirname(__file__), "..", "accuracy_corpus.json")
+
+_file_name_re = re.compile(r"[^\w.-]")
+
+
+def weights_fingerprint(model) -> str:
+    """모델 가중치 내용의 해시 (같은 이름의 모델이라도 가중치가 바뀌면 값이 달라짐)"""
+    digest = hashlib.blake2b(digest_size=8)
+    for name, tensor in model.state_dict().items():
+        digest.update(name.encode("utf-8"))
+        digest.update(tensor.detach().cpu().contiguous().numpy())
+    return digest.hexdigest()
+
+
+def configure_torch_threads():
+    """PyTorch 스레드 수를 설정합니다. (inter-op 스레드는 첫 병렬 연산 전에만 바꿀 수 있음)"""
+    import torch
+
+    if SUMMARY_INTRA_OP_THREADS > 0:
+        torch.set_num_threads(SUMMARY_INTRA_OP_THREADS)
+    if SUMMARY_INTER_OP_THREADS > 0:
+        try:
+            torch.set_num_interop_threads(SUMMARY_INTER_OP_THREADS)
+        except RuntimeError as e:
+            logger.warning("inter-op 스레드 수를 설정하지 못했습니다: %s", e)
+
+
+class TorchBackend:
+    """PyTorch fp32 추론 (기준 백엔드)"""
+
+    name = "torch"
+
+    def __init__(self, model, model_name: str):
+        configure_torch_threads()
+        self.model = model
+
+    def limit_threads(self, num_threads: int):
+        """연산 스레드 수를 바꿉니다. (app.serve가 워커마다 코어를 나눠 줄 때 사용)"""
+        import torch
+
+        torch.set_num_threads(num_threads)
+
+    def embed(self, inputs) -> np.ndarray:
+        """토크나이저 출력(numpy 배열 dict)을 받아 [CLS] 벡터를 반환합니다."""
+        import torch
+
+        tensors = {key: torch.from_numpy(value) for key, value in inputs.items()}
+        with torch.no_grad():
+            outputs = self.model(**tensors)
+        return outputs.last_hidden_state[:, 0, :].numpy()
+
+
+class TorchInt8Backend(TorchBackend):
+    """Linear 층 가중치를 int8로 동적 양자화한 PyTorch 추론"""
+
+    name = "torch-int8"
+
+    def __init__(self, model, model_name: str):
+        import torch
+
+        super().__init__(model, model_name)
+        self.model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OnnxBackend:
+    """ONNX Runtime CPU 추론. 내보낸 그래프가 없으면 PyTorch 모델에서 한 번 내보냅니다."""
+
+    name = "onnx"
+
+    def __init__(self, model, model_name: str):
+        try:
+            import onnxruntime  # noqa: F401
+        except ImportError:
+            raise RuntimeError("onnx 백엔드를 사용하려면 onnxruntime 패키지를 설치해주세요.")
+
+        # 가중치나 내보내기 설정이 바뀌면 이전에 내보낸 파일을 쓰지 않도록 파일 이름에 함께 넣음
+        file_name = (f"{_file_name_re.sub('_', model_name)}-{weights_fingerprint(model)}"
+                     f"-opset{ONNX_OPSET}-r{ONNX_EXPORT_REVISION}.onnx")
+        self.model_path = os.path.join(ONNX_MODEL_DIR, file_name)
+        if not os.path.exists(self.model_path):
+            self.export(model, self.model_path)
+
+        self.session = self._create_session(SUMMARY_INTRA_OP_THREADS)
+        self.input_names = {node.name for node in self.session.get_inputs()}
+
+    def _create_session(self, intra_op_threads: int):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        if SUMMARY_INTER_OP_THREADS > 0:
+            options.inter_op_num_threads = SUMMARY_INTER_OP_THREADS
+        return ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+
+    def limit_threads(self, num_threads: int):
+        """
+        연산 스레드 수를 바꿉니다. ONNX Runtime은 세션을 만들 때 스레드 풀을 만들므로 세션을 다시 만듭니다.
+        (fork한 워커는 마스터 세션의 스레드 풀 스레드를 물려받지 못하므로 워커에서 새로 만들어야 함)
+        """
+        self.session = self._create_session(num_threads)
+
+    @staticmethod
+    def export(model, path: str):
+        """PyTorch BertModel을 배치/길이 축이 가변인 ONNX 그래프로 내보냅니다."""
+        import torch
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        dummy = torch.ones((1, 8), dtype=torch.long)
+        dynamic_axes = {name: {0: "batch", 1: "sequence"}
+                        for name in ("input_ids", "attention_mask", "token_type_ids", "last_hidden_state")}
+        # 다른 프로세스가 반쯤 쓴 파일을 읽지 않도록 임시 파일에 쓴 뒤 이름 변경
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        torch.onnx.export(
+            model, (dummy, dummy, torch.zeros_like(dummy)), tmp_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes, opset_version=ONNX_OPSET, dynamo=False,
+        )
+        os.replace(tmp_path, path)
+        logger.info("ONNX 모델을 '%s' 파일로 내보냈습니다.", path)
+
+    def embed(self, inputs) -> np.ndarray:
+        feed = {key: value.astype(np.int64) for key, value in inputs.items() if key in self.input_names}
+        last_hidden_state = self.session.run(["last_hidden_state"], feed)[0]
+        return last_hidden_state[:, 0, :]
+
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    TorchInt8Backend.name: TorchInt8Backend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+
+def create_backend(name: str, model, model_name: str):
+    """이름에 해당하는 추론 백엔드를 만듭니다."""
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"알 수 없는 추론 백엔드입니다: {name} (사용 가능: {', '.join(BACKENDS)})")
+    return backend_class(model, model_name)
+
+
+def check_backend_accuracy(runtime, candidate, reference, texts, top_n: int = 3) -> dict:
+    """
+    같은 말뭉치를 두 백엔드로 요약해 상위 top_n 문장 선택이 얼마나 겹치는지 비교합니다.
+    - overlap: 기사별 (겹친 문장 수 / top_n)의 평균과 최솟값
+    - exact_match: 선택한 문장과 순서가 완전히 같은 기사 비율
+    - cosine: 같은 문장의 두 임베딩 간 코사인 유사도 평균
+    """
+    import kss
+    from .scorers import get_scorer, normalize_rows
+
+    scorer = get_scorer()
+    overlaps, exact, cosines = [], 0, []
+    timings = {candidate.name: 0.0, reference.name: 0.0}
+    sentence_count = 0
+    for text in texts:
+        sentences = kss.split_sentences(text)
+        sentence_count += len(sentences)
+        selections = {}
+        embeddings = {}
+        for backend in (reference, candidate):
+            started = time.perf_counter()
+            embeddings[backend.name] = runtime.encode(sentences, backend=backend)
+            timings[backend.name] += time.perf_counter() - started
+            selections[backend.name] = scorer.rank(embeddings[backend.name], top_n)
+
+        ref_selection, cand_selection = selections[reference.name], selections[candidate.name]
+        overlaps.append(len(set(ref_selection) & set(cand_selection)) / max(1, len(ref_selection)))
+        exact += ref_selection == cand_selection
+        cosines.extend(np.sum(
+            normalize_rows(embeddings[reference.name]) * normalize_rows(embeddings[candidate.name]), axis=1
+        ).tolist())
+
+    return {
+        "reference": reference.name,
+        "candidate": candidate.name,
+        "articles": len(texts),
+        "sentences": sentence_count,
+        "top_n": top_n,
+        "mean_overlap": float(np.mean(overlaps)) if overlaps else 0.0,
+        "min_overlap": float(np.min(overlaps)) if overlaps else 0.0,
+        "exact_match": exact / len(texts) if texts else 0.0,
+        "mean_cosine": float(np.mean(cosines)) if cosines else 0.0,
+        "sentences_per_second": {
+            name: sentence_count / seconds if seconds else None for name, seconds in timings.items()
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="추론 백엔드의 요약 문장 선택 정확도를 fp32 기준과 비교합니다.")
+    parser.add_argument("--backend", default=SUMMARY_BACKEND, choices=sorted(BACKENDS))
+    parser.add_argument("--reference", default=TorchBackend.name, choices=sorted(BACKENDS))
+    parser.add_argument("--corpus", default=ACCURACY_CORPUS_PATH)
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--min-overlap", type=float, default=0.8,
+                        help="평균 문장 겹침 비율이 이 값보다 낮으면 실패(종료 코드 1)")
+    args = parser.parse_args(argv)
+
+    from .log_config import configure_logging
+    from .model_runtime import get_model_runtime
+
+    configure_logging()
+
+    runtime = get_model_runtime()
+    with open(args.corpus, encoding="utf-8") as f:
+        texts = json.load(f)
+    reference = create_backend(args.reference, runtime.model, runtime.model_name)
+    candidate = create_backend(args.backend, runtime.model, runtime.model_name)
+    report = check_backend_accuracy(runtime, candidate, reference, texts, top_n=args.top_n)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0 if report["mean_overlap"] >= args.min_overlap else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+# log_config.py
+# 앱 전체 로그 설정 (LOG_LEVEL 환경 변수로 레벨을 정하고, OFF면 로그를 끔)
+import logging
+import os
+
+# 로그 레벨: DEBUG / INFO / WARNING / ERROR / CRITICAL / OFF
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "%(asctime)s %(levelname)s %(name)s: %(message)s")
+# 요청마다 INFO 로그를 남기는 라이브러리 로거 (DEBUG가 아니면 경고 이상만 출력)
+NOISY_LOGGERS = ("httpx", "httpcore")
+
+
+def configure_logging(level: str = LOG_LEVEL):
+    """루트 로거의 핸들러를 LOG_FORMAT 형식으로 다시 설정하고 레벨을 지정합니다."""
+    if level == "OFF":
+        logging.disable(logging.CRITICAL)
+        return
+    logging.disable(logging.NOTSET)
+    # kss는 import할 때 루트 로거에 자체 형식("[Kss]: ...")의 핸들러를 달아 두므로 교체
+    logging.basicConfig(format=LOG_FORMAT, level=level, force=True)
+    for name in NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(logging.NOTSET if level == "DEBUG" else logging.WARNING)
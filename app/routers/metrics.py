@@ -0,0 +1,152 @@
+# metrics.py
+# 요약 파이프라인 계측 (단계별 소요 시간, 캐시 적중, 합쳐진 요청, upstream 오류, 대기열 길이)
+# /metrics 에서 Prometheus 텍스트 형식으로 노출하고, 요청별 단계 시간은 Server-Timing 헤더로 돌려줍니다.
+import asyncio
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+# app.serve로 여러 워커를 띄우면 워커마다 따로 세는 값을 이 폴더의 파일로 모아 합산합니다.
+# (prometheus_client가 import될 때 읽으므로 app.serve가 앱을 import하기 전에 설정)
+METRICS_MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+# 여러 워커 모드에서 대기열 길이를 다시 기록하는 주기 (초)
+METRICS_SAMPLE_INTERVAL = float(os.environ.get("METRICS_SAMPLE_INTERVAL", "1.0"))
+
+# 단계별 소요 시간 구간 (초). 긴 기사의 문장 분리는 수십 초가 걸리기도 해서 위쪽 구간을 넓게 둠
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_SECONDS = Histogram(
+    "summary_stage_seconds", "요약 파이프라인 단계별 소요 시간 (초)", ["stage"], buckets=STAGE_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "summary_cache_lookups", "캐시 조회 결과 (cache: summary/embedding, result: hit/miss)", ["cache", "result"],
+)
+UPSTREAM_ERRORS = Counter(
+    "upstream_errors", "외부 요청 실패 (재시도한 시도 포함)", ["reason"],
+)
+SINGLE_FLIGHT_REQUESTS = Counter(
+    "single_flight_requests", "같은 키의 동시 요청 처리 결과 (flight: summary/weather, result: executed/coalesced)",
+    ["flight", "result"],
+)
+QUEUE_DEPTH = Gauge(
+    "summary_queue_depth", "처리를 기다리거나 처리 중인 작업 수", ["queue"],
+    multiprocess_mode="livesum",  # 여러 워커 모드에서는 살아 있는 워커들의 값을 합산
+)
+
+# 여러 워커 모드에서 주기적으로 읽을 대기열 길이 함수 (대기열 이름 -> 함수)
+_queue_depth_functions = {}
+
+# 현재 요청의 단계별 시간 (Server-Timing 헤더용, 요청마다 새 dict)
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+# 워커 풀 작업 안에서 잰 단계 시간 (작업이 끝난 뒤 요청 쪽에서 한꺼번에 기록)
+_worker_timings = contextvars.ContextVar("worker_timings", default=None)
+# 워커 풀 작업 안에서 센 캐시 조회 수 ((캐시, 결과) -> 수, 작업이 끝난 뒤 요청 쪽에서 한꺼번에 기록)
+_worker_lookups = contextvars.ContextVar("worker_lookups", default=None)
+
+
+def track_queue_depth(queue: str, fn):
+    """대기열 길이를 돌려주는 fn을 QUEUE_DEPTH 게이지에 연결합니다."""
+    if METRICS_MULTIPROCESS:
+        # 다른 워커가 수집할 때는 이 프로세스의 함수를 부를 수 없으므로 값을 주기적으로 기록
+        _queue_depth_functions[queue] = fn
+    else:
+        QUEUE_DEPTH.labels(queue).set_function(fn)
+
+
+def sample_queue_depths():
+    for queue, fn in _queue_depth_functions.items():
+        QUEUE_DEPTH.labels(queue).set(fn())
+
+
+async def sample_queue_depths_forever(interval: float = METRICS_SAMPLE_INTERVAL):
+    while True:
+        sample_queue_depths()
+        await asyncio.sleep(interval)
+
+
+def render_metrics() -> bytes:
+    """Prometheus 텍스트 형식의 지표를 반환합니다. (여러 워커 모드면 모든 워커의 값을 합산)"""
+    if not METRICS_MULTIPROCESS:
+        return generate_latest()
+    sample_queue_depths()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def record_stage(name: str, seconds: float):
+    """단계 시간을 히스토그램과 현재 요청의 Server-Timing에 더합니다."""
+    worker = _worker_timings.get()
+    if worker is not None:
+        worker[name] = worker.get(name, 0.0) + seconds
+        return
+    STAGE_SECONDS.labels(name).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def record_cache_lookup(cache: str, result: str, count: int = 1):
+    """캐시 조회 결과(result: hit/miss)를 CACHE_LOOKUPS에 더합니다."""
+    worker = _worker_lookups.get()
+    if worker is not None:
+        worker[(cache, result)] = worker.get((cache, result), 0) + count
+        return
+    CACHE_LOOKUPS.labels(cache, result).inc(count)
+
+
+@contextmanager
+def stage(name: str):
+    """with 블록의 실행 시간을 name 단계로 기록합니다."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def run_with_timings(fn, submitted_at: float, *args, **kwargs):
+    """
+    워커 풀에서 fn을 실행하고 (결과, 단계별 시간, 캐시 조회 수)를 반환합니다.
+    프로세스 풀에서는 자식 프로세스의 지표가 수집되지 않으므로 시간과 캐시 조회 수를 결과와 함께 돌려받습니다.
+    submitted_at(time.monotonic)부터 실행 시작까지는 queue 단계로 기록합니다.
+    """
+    timings = {"queue": max(0.0, time.monotonic() - submitted_at)}
+    lookups = {}
+    token = _worker_timings.set(timings)
+    lookups_token = _worker_lookups.set(lookups)
+    try:
+        return fn(*args, **kwargs), timings, lookups
+    finally:
+        _worker_lookups.reset(lookups_token)
+        _worker_timings.reset(token)
+
+
+def start_request_timings() -> dict:
+    """현재 요청의 단계 시간을 모을 dict를 만들어 반환합니다."""
+    timings = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def merge_request_timings(timings: dict):
+    """
+    다른 작업(합쳐진 요청의 공유 작업 등)에서 잰 단계 시간을 현재 요청의 Server-Timing에 더합니다.
+    히스토그램에는 그 작업에서 이미 기록했으므로 다시 기록하지 않습니다.
+    """
+    current = _request_timings.get()
+    if current is None or current is timings:
+        return
+    for name, seconds in timings.items():
+        current[name] = current.get(name, 0.0) + seconds
+
+
+def server_timing_header(timings: dict, total: float = None) -> str:
+    """{단계: 초} dict를 Server-Timing 헤더 값으로 만듭니다. (예: fetch;dur=12.3, embed;dur=40.1)"""
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
@@ -0,0 +1,143 @@
+# model_runtime.py
+# KoBERT 토크나이저/모델을 프로세스당 한 번만 로드해서 재사용하기 위한 런타임
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 사용할 모델 이름 (로컬 경로를 지정하면 오프라인에서도 로드 가능)
+MODEL_NAME = os.environ.get("SUMMARY_MODEL_NAME", "monologg/kobert")
+
+# 런타임 상태 값
+STATE_NOT_LOADED = "not_loaded"
+STATE_LOADING = "loading"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+
+
+class ModelRuntime:
+    """
+    요약에 필요한 토크나이저와 모델(eval 모드)을 들고 있는 프로세스 전역 객체입니다.
+    state 값으로 준비 여부(readiness)를 확인할 수 있습니다.
+    """
+
+    def __init__(self, model_name: str = MODEL_NAME):
+        self.model_name = model_name
+        self.tokenizer = None
+        self.model = None
+        self.backend = None
+        self.state = STATE_NOT_LOADED
+        self.error = None
+        self.load_seconds = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == STATE_READY
+
+    def load(self):
+        """토크나이저와 모델을 로드하고 eval 모드로 전환합니다."""
+        self.state = STATE_LOADING
+        started = time.perf_counter()
+        try:
+            # 무거운 라이브러리는 실제로 로드할 때만 import
+            from transformers import BertModel, BertTokenizer
+
+            self.tokenizer = BertTokenizer.from_pretrained(self.model_name)
+            model = BertModel.from_pretrained(self.model_name)
+            model.eval()
+            # 추론 전용이므로 그래디언트 계산 비활성화
+            for param in model.parameters():
+                param.requires_grad_(False)
+            self.model = model
+            # 실제 추론은 선택한 백엔드(fp32 / int8 / ONNX Runtime)가 담당
+            from .inference_backends import create_backend, SUMMARY_BACKEND
+            self.backend = create_backend(SUMMARY_BACKEND, model, self.model_name)
+            # kss는 첫 호출 때 분리기 백엔드를 초기화하므로 미리 한 번 실행
+            import kss
+            kss.split_sentences("모델 준비 중입니다. 잠시만 기다려 주세요.")
+        except Exception as e:
+            self.state = STATE_FAILED
+            self.error = str(e)
+            logger.error("모델 '%s' 로드 실패: %s", self.model_name, e)
+            raise
+        self.load_seconds = time.perf_counter() - started
+        self.state = STATE_READY
+        logger.info("모델 '%s' (%s) 로드 완료 (%.2f초)", self.model_name, self.backend.name, self.load_seconds)
+
+    @property
+    def cache_namespace(self) -> str:
+        """임베딩 캐시 키 구분용 이름 (모델과 백엔드가 다르면 벡터도 다름)"""
+        return f"{self.model_name}:{self.backend.name}"
+
+    def encode(self, sentences, batch_size: int = 32, backend=None):
+        """
+        여러 문장을 한 번에 임베딩합니다. ([CLS] 벡터, shape: (문장 수, hidden))
+        길이순으로 정렬한 뒤 batch_size 단위로 묶어 패딩 낭비를 줄이고,
+        결과는 입력 순서대로 되돌려 반환합니다.
+        backend를 지정하지 않으면 로드할 때 선택한 백엔드를 사용합니다.
+        """
+        import numpy as np
+
+        backend = backend or self.backend
+
+        hidden_size = self.model.config.hidden_size
+        if not sentences:
+            return np.zeros((0, hidden_size), dtype=np.float32)
+
+        # 길이가 비슷한 문장끼리 같은 버킷에 들어가도록 정렬
+        order = sorted(range(len(sentences)), key=lambda i: len(sentences[i]))
+        embeddings = np.empty((len(sentences), hidden_size), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            bucket = order[start:start + batch_size]
+            inputs = self.tokenizer(
+                [sentences[i] for i in bucket],
+                return_tensors="np", padding=True, truncation=True,
+                max_length=self.model.config.max_position_embeddings,
+            )
+            # [CLS] 토큰의 벡터 사용
+            embeddings[bucket] = backend.embed(dict(inputs))
+        return embeddings
+
+    def status(self) -> dict:
+        """readiness 확인용 상태 정보를 반환합니다."""
+        return {
+            "model": self.model_name,
+            "backend": self.backend.name if self.backend is not None else None,
+            "state": self.state,
+            "error": self.error,
+            "load_seconds": self.load_seconds,
+        }
+
+
+# 프로세스 전역 런타임 (load_model_runtime으로 초기화)
+_runtime = ModelRuntime()
+_runtime_lock = threading.Lock()
+
+
+def load_model_runtime() -> ModelRuntime:
+    """
+    전역 런타임을 로드합니다. 이미 준비된 경우에는 그대로 반환합니다.
+    여러 스레드에서 동시에 호출돼도 실제 로드는 한 번만 일어납니다.
+    """
+    if _runtime.ready:
+        return _runtime
+    with _runtime_lock:
+        if not _runtime.ready:
+            _runtime.load()
+    return _runtime
+
+
+def get_model_runtime() -> ModelRuntime:
+    """
+    요청 처리 중에 사용할 런타임을 반환합니다.
+    startup 이벤트 없이 호출된 경우(스크립트 등)에는 이 시점에 로드합니다.
+    """
+    if _runtime.ready:
+        return _runtime
+    return load_model_runtime()
+
+
+def model_runtime_status() -> dict:
+    return _runtime.status()
@@ -0,0 +1,133 @@
+# scorers.py
+# 문장 임베딩으로 요약에 쓸 문장을 고르는 점수 계산기 모음
+import os
+
+import numpy as np
+
+# 기본으로 사용할 점수 계산기 이름 ("centroid", "mmr", "textrank")
+SUMMARY_SCORER = os.environ.get("SUMMARY_SCORER", "centroid")
+# MMR에서 중요도와 중복 회피 사이의 비율 (1에 가까울수록 중요도 우선)
+MMR_LAMBDA = float(os.environ.get("MMR_LAMBDA", "0.7"))
+
+
+def normalize_rows(embeddings) -> np.ndarray:
+    """각 행을 L2 정규화합니다. (길이가 0인 행은 그대로 0)"""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+
+def top_indices(scores, top_n: int) -> list:
+    """점수가 높은 순서로 top_n개의 인덱스를 반환합니다. (동점이면 앞 문장 우선)"""
+    scores = np.asarray(scores)
+    top_n = min(top_n, len(scores))
+    if top_n <= 0:
+        return []
+    if top_n < len(scores):
+        # 전체 정렬 대신 상위 후보만 골라낸 뒤 정렬
+        candidates = np.argpartition(-scores, top_n - 1)[:top_n]
+        threshold = scores[candidates].min()
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(len(scores))
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:top_n].tolist()
+
+
+class CentroidScorer:
+    """
+    문장별 코사인 유사도 행렬의 행 합과 같은 순위를 O(N·d)로 계산합니다.
+    정규화 벡터 n_i에 대해 sum_j cos(i, j) = n_i · (sum_j n_j) 이므로
+    N×N 행렬을 만들지 않고 중심 벡터와의 내적만 구하면 됩니다.
+    """
+
+    name = "centroid"
+
+    def scores(self, embeddings) -> np.ndarray:
+        normalized = normalize_rows(embeddings)
+        return normalized @ normalized.sum(axis=0)
+
+    def rank(self, embeddings, top_n: int) -> list:
+        return top_indices(self.scores(embeddings), top_n)
+
+
+class MMRScorer:
+    """
+    Maximal Marginal Relevance: 중심 벡터와의 유사도가 높으면서
+    이미 고른 문장과는 덜 비슷한 문장을 차례로 고릅니다. (O(top_n·N·d))
+    """
+
+    name = "mmr"
+
+    def __init__(self, lambda_: float = MMR_LAMBDA):
+        self.lambda_ = lambda_
+
+    def rank(self, embeddings, top_n: int) -> list:
+        normalized = normalize_rows(embeddings)
+        count = len(normalized)
+        top_n = min(top_n, count)
+        if top_n <= 0:
+            return []
+        # 중심 벡터와의 유사도를 중요도로 사용 (순서는 CentroidScorer와 같음)
+        relevance = normalized @ normalized.sum(axis=0) / count
+        max_redundancy = np.full(count, -np.inf, dtype=np.float32)
+        selected = []
+        available = np.ones(count, dtype=bool)
+        for _ in range(top_n):
+            redundancy = np.where(np.isfinite(max_redundancy), max_redundancy, 0.0)
+            mmr = self.lambda_ * relevance - (1 - self.lambda_) * redundancy
+            mmr[~available] = -np.inf
+            best = int(np.argmax(mmr))
+            selected.append(best)
+            available[best] = False
+            max_redundancy = np.maximum(max_redundancy, normalized @ normalized[best])
+        return selected
+
+
+class TextRankScorer:
+    """
+    유사도 그래프 위에서 PageRank를 계산합니다.
+    N×N 유사도 행렬을 만들기 때문에 문장이 아주 많은 기사에는 권장하지 않습니다.
+    """
+
+    name = "textrank"
+
+    def __init__(self, damping: float = 0.85, max_iter: int = 100, tol: float = 1e-6):
+        self.damping = damping
+        self.max_iter = max_iter
+        self.tol = tol
+
+    def scores(self, embeddings) -> np.ndarray:
+        normalized = normalize_rows(embeddings)
+        count = len(normalized)
+        similarity = np.clip(normalized @ normalized.T, 0.0, None)
+        np.fill_diagonal(similarity, 0.0)
+        row_sums = similarity.sum(axis=1, keepdims=True)
+        row_sums[row_sums == 0] = 1.0
+        transition = similarity / row_sums
+        rank = np.full(count, 1.0 / count)
+        for _ in range(self.max_iter):
+            updated = (1 - self.damping) / count + self.damping * (transition.T @ rank)
+            if np.abs(updated - rank).sum() < self.tol:
+                return updated
+            rank = updated
+        return rank
+
+    def rank(self, embeddings, top_n: int) -> list:
+        return top_indices(self.scores(embeddings), top_n)
+
+
+SCORERS = {
+    CentroidScorer.name: CentroidScorer,
+    MMRScorer.name: MMRScorer,
+    TextRankScorer.name: TextRankScorer,
+}
+
+
+def get_scorer(name: str = SUMMARY_SCORER):
+    """이름으로 점수 계산기를 만듭니다."""
+    try:
+        return SCORERS[name]()
+    except KeyError:
+        raise ValueError(f"알 수 없는 점수 계산기입니다: {name} (사용 가능: {', '.join(SCORERS)})")
@@ -0,0 +1,262 @@
+# section_crawler.py
+# YTN 섹션 목록(list.php?mcd=...)을 주기적으로 확인해 새 기사를 미리 요약해 두는 백그라운드 크롤러
+# 미리 만든 요약은 요약 캐시와 요약 기록 저장소에 들어가므로, 사용자가 처음 누른 기사도 바로 응답합니다.
+# (app.serve로 여러 워커를 띄우면 다른 워커는 요약 기록 저장소에서 찾아 응답)
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+from bs4 import BeautifulSoup, SoupStrainer
+
+from .extractors import HTML_PARSER, YTN_CATEGORY_MAP
+from .http_client import get_http_client
+from .processor import YTN_HEADERS
+from .summarize import ArticleExtractionError, summarize_url, summary_variant
+from .summary_cache import canonicalize_url
+from .summary_store import SUMMARY_DB_PATH, get_summary_store
+from .worker_pool import PoolFullError, get_worker_pool, summary_runtime_status
+
+try:
+    import fcntl
+except ImportError:
+    # Windows에서는 잠금 없이 실행 (fork를 쓰는 app.serve를 쓸 수 없으므로 크롤러를 실행하는 프로세스는 하나뿐)
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 크롤러 사용 여부 (기본은 꺼져 있음, CRAWLER_ENABLED=1로 켬)
+CRAWLER_ENABLED = os.environ.get("CRAWLER_ENABLED", "0") == "1"
+# 섹션 목록 주소 ({mcd}에 카테고리 코드가 들어감, 테스트 시 로컬 서버 주소로 바꿀 수 있음)
+CRAWLER_LIST_URL = os.environ.get("CRAWLER_LIST_URL", "https://www.ytn.co.kr/news/list.php?mcd={mcd}")
+# 확인할 카테고리 코드 (쉼표로 구분, 비워 두면 YTN_CATEGORY_MAP 전체)
+CRAWLER_CATEGORIES = [code for code in os.environ.get("CRAWLER_CATEGORIES", "").split(",") if code.strip()]
+# 섹션 목록을 다시 확인하는 주기 (초)
+CRAWLER_INTERVAL = float(os.environ.get("CRAWLER_INTERVAL", "300"))
+# 같은 호스트에 보내는 요청 사이의 최소 간격 (초)
+CRAWLER_HOST_INTERVAL = float(os.environ.get("CRAWLER_HOST_INTERVAL", "1.0"))
+# 한 번에 함께 요약할 기사 수와 한 주기에 요약할 최대 기사 수
+CRAWLER_BATCH_SIZE = int(os.environ.get("CRAWLER_BATCH_SIZE", "2"))
+CRAWLER_MAX_PER_CYCLE = int(os.environ.get("CRAWLER_MAX_PER_CYCLE", "50"))
+# 워커 풀에 이보다 많은 작업이 있으면 사용자 요청이 처리 중인 것으로 보고 기다림
+CRAWLER_IDLE_PENDING = int(os.environ.get("CRAWLER_IDLE_PENDING", "0"))
+# 워커 풀이 바쁠 때 다시 확인하기까지 기다리는 시간 (초)
+CRAWLER_IDLE_WAIT = float(os.environ.get("CRAWLER_IDLE_WAIT", "1.0"))
+# 이미 처리한 기사 URL을 기억할 최대 개수
+CRAWLER_SEEN_MAX = int(os.environ.get("CRAWLER_SEEN_MAX", "5000"))
+# 여러 워커 중 이 파일을 먼저 잠근 워커 하나만 크롤러를 실행 (요약 기록 DB마다 하나)
+CRAWLER_LOCK_FILE = os.environ.get("CRAWLER_LOCK_FILE", f"{SUMMARY_DB_PATH}.crawler.lock")
+# 잠금을 얻지 못한 워커가 다시 시도하는 주기 (초). 실행 중인 워커가 죽으면 다른 워커가 이어받음
+CRAWLER_LOCK_RETRY = float(os.environ.get("CRAWLER_LOCK_RETRY", "30"))
+
+# 목록 페이지의 링크만 파싱
+_link_strainer = SoupStrainer("a", href=True)
+
+
+def parse_article_links(html: str, page_url: str) -> list:
+    """목록 페이지에서 /_ln/ 기사 링크를 절대 URL로 모아 (나온 순서대로, 중복 없이) 반환합니다."""
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=_link_strainer)
+    links = {}
+    for a in soup.find_all("a", href=True):
+        url = urljoin(page_url, a["href"])
+        if "/_ln/" in urlsplit(url).path:
+            links.setdefault(canonicalize_url(url), url)
+    return list(links.values())
+
+
+class HostRateLimiter:
+    """호스트별로 요청 사이에 최소 interval초 간격을 둡니다."""
+
+    def __init__(self, interval: float = CRAWLER_HOST_INTERVAL):
+        self.interval = interval
+        self._next_at = {}  # 호스트 -> 다음 요청을 보낼 수 있는 시각 (time.monotonic)
+
+    async def wait(self, url: str):
+        host = urlsplit(url).hostname or ""
+        now = time.monotonic()
+        slot = max(now, self._next_at.get(host, now))
+        # 기다리는 동안 다른 요청이 같은 슬롯을 잡지 않도록 먼저 예약
+        self._next_at[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class SectionCrawler:
+    """
+    섹션 목록에서 처음 보는 기사만 골라 낮은 우선순위로 요약합니다.
+    - 워커 풀에 사용자 요청이 있으면 끝날 때까지 기다렸다가 batch_size개씩 처리
+    - 처리한 기사 URL(정규화)은 seen에 기억해 다시 요약하지 않음 (시작 시 요약 기록에서 채움)
+    - 목록 페이지는 조건부 GET으로 가져와 바뀌지 않았으면 파싱하지 않음
+    - app.serve의 여러 워커 중 잠금 파일을 얻은 워커 하나만 크롤링하고, 요약은 요약 기록 저장소로 공유
+    """
+
+    def __init__(self, list_url: str = CRAWLER_LIST_URL, categories=None, interval: float = CRAWLER_INTERVAL,
+                 batch_size: int = CRAWLER_BATCH_SIZE, max_per_cycle: int = CRAWLER_MAX_PER_CYCLE,
+                 seen_max: int = CRAWLER_SEEN_MAX, lock_path: str = CRAWLER_LOCK_FILE):
+        self.list_url = list_url
+        self.categories = list(categories or CRAWLER_CATEGORIES or YTN_CATEGORY_MAP)
+        self.interval = interval
+        self.batch_size = max(1, batch_size)
+        self.max_per_cycle = max_per_cycle
+        self.seen_max = seen_max
+        self.lock_path = lock_path
+        self._lock_file = None
+        self.leader = False   # 잠금을 얻어 이 워커가 크롤링 중인지 (다른 워커는 잠금을 기다림)
+        self.limiter = HostRateLimiter()
+        self._seen = OrderedDict()  # 정규화 URL -> None (LRU 순서)
+        self._page_links = {}       # 목록 페이지 URL -> 마지막으로 파싱한 기사 URL 목록
+        self._task = None
+        self.cycles = 0
+        self.summarized = 0   # 새로 요약한 기사 수
+        self.failed = 0       # 본문 추출/요약에 실패한 기사 수
+        self.last_cycle_at = None
+
+    def _mark_seen(self, url_key: str):
+        self._seen[url_key] = None
+        self._seen.move_to_end(url_key)
+        while len(self._seen) > self.seen_max:
+            self._seen.popitem(last=False)
+
+    async def load_seen(self):
+        """요약 기록 저장소에 이미 있는 URL을 seen으로 채웁니다. (재시작해도 다시 요약하지 않도록)"""
+        urls = await asyncio.to_thread(get_summary_store().recent_urls, self.seen_max)
+        for url_key in reversed(urls):
+            self._mark_seen(url_key)
+
+    async def discover(self, mcd: str) -> list:
+        """카테고리 mcd의 목록 페이지에서 아직 처리하지 않은 기사 URL을 반환합니다."""
+        page_url = self.list_url.format(mcd=mcd)
+        await self.limiter.wait(page_url)
+        try:
+            result = await get_http_client().fetch(page_url, YTN_HEADERS)
+        except httpx.HTTPError as e:
+            logger.warning("섹션 목록 %s 가져오기 실패: %s", page_url, e)
+            return []
+        links = self._page_links.get(page_url)
+        # 바뀌지 않은 목록은 다시 파싱하지 않고, 지난번에 처리하지 못한 기사만 다시 확인
+        if links is None or not result.not_modified:
+            links = await asyncio.to_thread(parse_article_links, result.text, page_url)
+            self._page_links[page_url] = links
+        return [url for url in links if canonicalize_url(url) not in self._seen]
+
+    def _try_lock(self) -> bool:
+        """잠금 파일을 잠그면 True, 다른 프로세스가 이미 잠그고 있으면 False를 반환합니다."""
+        if fcntl is None or not self.lock_path:
+            return True
+        lock_file = open(self.lock_path, "a")
+        try:
+            # 프로세스가 죽으면 파일이 닫히면서 잠금도 풀림
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _unlock(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    async def _wait_for_idle(self):
+        # 사용자 요청이 워커 풀을 쓰고 있으면 양보
+        pool = get_worker_pool()
+        while pool.pending > CRAWLER_IDLE_PENDING or pool.is_full:
+            await asyncio.sleep(CRAWLER_IDLE_WAIT)
+
+    async def _summarize_one(self, url: str):
+        await self.limiter.wait(url)
+        url_key = canonicalize_url(url)
+        try:
+            summarized = await summarize_url(url)
+        except PoolFullError:
+            # 다음 주기에 다시 시도
+            return
+        except ArticleExtractionError as e:
+            logger.info("기사 %s 본문 추출 실패: %s", url, e)
+            self.failed += 1
+        except Exception as e:
+            logger.warning("기사 %s 요약 중 오류 발생: %s", url, e)
+            self.failed += 1
+            return
+        else:
+            # 본문이 같은 다른 기사의 요약을 재사용한 경우(cache_hit)도 이 URL의 기록은 새로 남김
+            # (기록에 variant와 본문 해시가 있으므로 다른 워커가 이 요약을 그대로 응답할 수 있음)
+            get_summary_store().append(url_key, summarized.summary, variant=summary_variant(),
+                                       body_hash=summarized.body_hash, checked_at=summarized.checked_at)
+            self.summarized += 1
+        self._mark_seen(url_key)
+
+    async def crawl_once(self):
+        """모든 카테고리 목록을 확인하고 새 기사를 batch_size개씩 요약합니다."""
+        new_urls = {}
+        for mcd in self.categories:
+            for url in await self.discover(mcd):
+                new_urls.setdefault(canonicalize_url(url), url)
+        urls = list(new_urls.values())[:self.max_per_cycle]
+        if urls:
+            logger.info("새 기사 %d건을 미리 요약합니다", len(urls))
+        for start in range(0, len(urls), self.batch_size):
+            await self._wait_for_idle()
+            await asyncio.gather(*(self._summarize_one(url) for url in urls[start:start + self.batch_size]))
+        self.cycles += 1
+        self.last_cycle_at = time.time()
+
+    async def _run(self):
+        # 모델 로드가 끝난 뒤 시작 (로드 중에 요약을 맡기면 워커가 로드를 기다리며 묶임)
+        while summary_runtime_status()["state"] != "ready":
+            await asyncio.sleep(CRAWLER_IDLE_WAIT)
+        while not self._try_lock():
+            await asyncio.sleep(CRAWLER_LOCK_RETRY)
+        self.leader = True
+        logger.info("섹션 크롤러를 시작합니다 (pid %d)", os.getpid())
+        # 이전에 크롤러를 실행하던 워커가 요약한 기사도 seen에 포함됨
+        await self.load_seen()
+        while True:
+            try:
+                await self.crawl_once()
+            except Exception as e:
+                logger.error("섹션 크롤링 중 오류 발생: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._unlock()
+        self.leader = False
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "pid": os.getpid(),
+            "leader": self.leader,
+            "categories": self.categories,
+            "cycles": self.cycles,
+            "summarized": self.summarized,
+            "failed": self.failed,
+            "seen": len(self._seen),
+            "last_cycle_at": self.last_cycle_at,
+        }
+
+
+# 앱 전역 섹션 크롤러
+_crawler = None
+
+
+def get_section_crawler() -> SectionCrawler:
+    global _crawler
+    if _crawler is None:
+        _crawler = SectionCrawler()
+    return _crawler
@@ -0,0 +1,49 @@
+# single_flight.py
+# 같은 키로 동시에 들어온 요청을 하나의 작업으로 합치는 single-flight 도우미
+import asyncio
+
+from .metrics import SINGLE_FLIGHT_REQUESTS
+
+
+class SingleFlight:
+    """
+    같은 키의 작업이 이미 진행 중이면 새로 시작하지 않고 그 결과를 함께 기다립니다.
+    기다리던 요청 하나가 취소돼도 공유 작업은 취소되지 않습니다. (asyncio.shield)
+    실행/합쳐진 요청 수는 name 라벨로 /metrics에도 기록합니다. (app.serve의 여러 워커 합계)
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._executed_counter = SINGLE_FLIGHT_REQUESTS.labels(name, "executed")
+        self._coalesced_counter = SINGLE_FLIGHT_REQUESTS.labels(name, "coalesced")
+        self._calls = {}
+        self.executed = 0   # 실제로 실행한 작업 수
+        self.coalesced = 0  # 진행 중인 작업에 합쳐진 요청 수
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # 기다리는 요청이 모두 사라진 뒤 실패해도 "예외를 확인하지 않음" 경고가 나지 않도록 확인 처리
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key, fn, *args, **kwargs):
+        """key로 진행 중인 작업이 있으면 그 결과를, 없으면 fn(*args, **kwargs)를 실행한 결과를 반환합니다."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.create_task(fn(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.executed += 1
+            self._executed_counter.inc()
+        else:
+            self.coalesced += 1
+            self._coalesced_counter.inc()
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": self.in_flight}
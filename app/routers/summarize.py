@@ -1,36 +1,257 @@
-from fastapi import APIRouter, Form
-from pydantic import BaseModel, HttpUrl
-import pandas as pd
+import asyncio
+import json
 import os
-from .processor import process_url
+import random
+import time
+from typing import List, NamedTuple, Optional
+from urllib.parse import urlsplit
+from fastapi import APIRouter, Form, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, HttpUrl
+from .processor import fetch_article_html, extract_article, summarize_article, is_article_extracted
+from .summary_cache import get_summary_cache, canonicalize_url, content_hash
+from .summary_store import get_summary_store
+from .embedding_cache import embedding_cache_stats
+from .scorers import SUMMARY_SCORER
+from .single_flight import SingleFlight
+from .metrics import merge_request_timings, server_timing_header, stage, start_request_timings
+from .worker_pool import get_worker_pool, PoolFullError, SUMMARY_RETRY_AFTER
 
 router = APIRouter()
 
+# 요약 문장 수 기본값 / 최대값
+SUMMARY_TOP_N = int(os.environ.get("SUMMARY_TOP_N", "3"))
+SUMMARY_MAX_TOP_N = int(os.environ.get("SUMMARY_MAX_TOP_N", "10"))
+
 class SummarizeRequest(BaseModel):
     url: HttpUrl
+    top_n: int = Field(SUMMARY_TOP_N, ge=1, le=SUMMARY_MAX_TOP_N)  # 요약에 포함할 문장 수
 
 class SummarizeResponse(BaseModel):
     summary: str
+    cache: str = "miss"  # 요약 캐시 적중 여부 ("hit" / "miss")
+
+# 배치 요약 요청 한 번에 받을 수 있는 최대 URL 수
+BATCH_MAX_URLS = int(os.environ.get("BATCH_MAX_URLS", "500"))
+# 같은 호스트에 동시에 보낼 수 있는 최대 요청 수
+BATCH_PER_HOST_CONCURRENCY = int(os.environ.get("BATCH_PER_HOST_CONCURRENCY", "4"))
+# 배치 하나가 동시에 처리할 수 있는 최대 URL 수
+BATCH_MAX_INFLIGHT = int(os.environ.get("BATCH_MAX_INFLIGHT", "8"))
+# 워커 풀이 가득 찼을 때 배치 항목 하나가 자리가 날 때까지 기다리는 최대 시간 (초)
+BATCH_POOL_WAIT = float(os.environ.get("BATCH_POOL_WAIT", "120"))
+
+class BatchSummarizeRequest(BaseModel):
+    urls: List[HttpUrl] = Field(..., min_length=1, max_length=BATCH_MAX_URLS)
+    top_n: int = Field(SUMMARY_TOP_N, ge=1, le=SUMMARY_MAX_TOP_N)
+
+class ArticleExtractionError(Exception):
+    """기사 본문을 추출하지 못했을 때 발생합니다. (article에 실패 값이 들어 있음)"""
+
+    def __init__(self, article: dict):
+        super().__init__(article['본문'])
+        self.article = article
+
+def _pool_full_error() -> HTTPException:
+    # 요청이 계속 쌓이지 않도록 503 + Retry-After로 거절
+    return HTTPException(
+        status_code=503,
+        detail="요약 요청이 많아 잠시 후 다시 시도해주세요.",
+        headers={"Retry-After": str(SUMMARY_RETRY_AFTER)},
+    )
+
+# 같은 URL(정규화 기준)로 동시에 들어온 요약 요청을 하나로 합침
+summary_flights = SingleFlight("summary")
+
+class SummaryResult(NamedTuple):
+    summary: str
+    cache_hit: bool
+    body_hash: Optional[str]
+    checked_at: Optional[float]  # 기사를 실제로 가져와 본문을 확인한 시각 (epoch 초, URL 캐시 TTL의 기준)
+
+def summary_variant(top_n: int = SUMMARY_TOP_N) -> str:
+    """요약 결과를 바꾸는 옵션(점수 계산기, 문장 수)을 캐시/요약 기록 키로 쓸 문자열로 만듭니다."""
+    return f"{SUMMARY_SCORER}:{top_n}"
+
+async def summarize_url(url: str, top_n: int = SUMMARY_TOP_N):
+    """
+    URL 하나를 요약하고 SummaryResult를 반환합니다.
+    같은 URL/옵션의 요약이 이미 진행 중이면 새로 시작하지 않고 그 결과를 함께 받습니다.
+    """
+    key = (canonicalize_url(url), SUMMARY_SCORER, top_n)
+    result, error, timings = await summary_flights.do(key, _summarize_url_timed, url, top_n)
+    # 공유 작업의 단계 시간을 이 요청의 Server-Timing에 반영 (먼저 시작한 요청만 받지 않도록)
+    merge_request_timings(timings)
+    if error is not None:
+        raise error
+    return result
+
+async def _summarize_url_timed(url: str, top_n: int):
+    """_summarize_url을 실행하고 (결과, 예외, 단계별 시간)을 반환합니다. 단계 시간은 이 작업에서만 따로 모읍니다."""
+    timings = start_request_timings()
+    try:
+        return await _summarize_url(url, top_n), None, timings
+    except Exception as e:
+        return None, e, timings
 
-CSV_SAVE_PATH = "../../summaries.csv"
+async def _summarize_url(url: str, top_n: int):
+    """
+    URL 하나를 요약하고 SummaryResult를 반환합니다.
+    1) 정규화 URL 키가 캐시나 요약 기록에 있으면 기사를 가져오지 않고 바로 반환
+    2) 기사를 가져와 본문 해시가 같은 요약이 캐시나 요약 기록에 있으면 추론 없이 재사용
+    3) 둘 다 없으면 워커 풀에서 요약 후 캐시에 저장
+    요약 기록은 모든 워커와 섹션 크롤러가 함께 쓰므로, 다른 프로세스가 만든 요약도 캐시처럼 재사용합니다.
+    (요약 기록은 기사를 가져와 확인한 시각이 캐시 TTL 안인 것만 사용. 캐시 적중으로 남긴 기록은 처음 확인한 시각을 유지)
+    """
+    cache = get_summary_cache()
+    store = get_summary_store()
+    url_key = canonicalize_url(url)
+    # 점수 계산기나 문장 수가 다르면 다른 요약이므로 캐시 키를 구분
+    variant = summary_variant(top_n)
+    cached = await cache.get_by_url(url_key, variant)
+    if cached is None:
+        cached = await asyncio.to_thread(store.latest_for_url, url_key, variant, time.time() - cache.url_ttl)
+        if cached is not None:
+            await cache.put(url_key, cached["body_hash"], cached["summary"], variant, cached["checked_at"])
+    if cached is not None:
+        cache.record(hit=True)
+        # 이전 버전 디스크 캐시 항목에는 checked_at이 없음 (요약 기록에는 남기지만 재사용되지는 않음)
+        return SummaryResult(cached["summary"], True, cached["body_hash"], cached.get("checked_at"))
+
+    pool = get_worker_pool()
+    # 대기열이 가득 찼으면 기사를 가져오기 전에 바로 거절
+    if pool.is_full:
+        raise PoolFullError("요약 작업 대기열이 가득 찼습니다")
+
+    # 기사 HTML은 비동기로 가져오고, 파싱/추론은 워커 풀에서 처리
+    with stage("fetch"):
+        html_content = await fetch_article_html(url)
+    checked_at = time.time()
+    article = await pool.run(extract_article, url, html_content)
+    if not is_article_extracted(article):
+        # 추출에 실패한 결과는 캐시하지 않고, 모델도 돌리지 않음
+        cache.record(hit=False)
+        raise ArticleExtractionError(article)
+
+    body_hash = content_hash(article['본문'])
+    summary = await cache.get_by_content(body_hash, variant)
+    if summary is None:
+        stored = await asyncio.to_thread(store.latest_for_content, body_hash, variant,
+                                         time.time() - cache.content_ttl)
+        summary = stored["summary"] if stored is not None else None
+    hit = summary is not None
+    if not hit:
+        summary = await pool.run(summarize_article, article, top_n)
+    await cache.put(url_key, body_hash, summary, variant, checked_at)
+    cache.record(hit=hit)
+    return SummaryResult(summary, hit, body_hash, checked_at)
 
 @router.post("/summarize", response_model=SummarizeResponse)
-async def summarize_news(req: SummarizeRequest):
-    # 받은 URL을 processor.py에 있는 함수로 처리
-    processed_result = process_url(str(req.url))
-
-    # CSV에 저장 (기존 내용이 있다면 추가)
-    df_new = pd.DataFrame([{"url": str(req.url), "summary": processed_result}])
-    if os.path.exists(CSV_SAVE_PATH):
-        df_old = pd.read_csv(CSV_SAVE_PATH)
-        df_combined = pd.concat([df_old, df_new], ignore_index=True)
-        df_combined.to_csv(CSV_SAVE_PATH, index=False)
+async def summarize_news(req: SummarizeRequest, response: Response = None):
+    # 단계별 소요 시간은 Server-Timing 헤더로 함께 돌려줌 (예: fetch;dur=12.3, embed;dur=40.1)
+    started = time.perf_counter()
+    timings = start_request_timings()
+    try:
+        summarized = await summarize_url(str(req.url), req.top_n)
+    except PoolFullError:
+        raise _pool_full_error()
+    except ArticleExtractionError as e:
+        # 추출 실패 시에는 실패 사유("본문 추출 실패" 등)를 그대로 돌려줌
+        result = SummarizeResponse(summary=e.article['본문'])
     else:
-        df_new.to_csv(CSV_SAVE_PATH, index=False)
+        # 요약 기록 저장 (쓰기 스레드가 모아서 기록하므로 응답을 기다리게 하지 않음)
+        get_summary_store().append(canonicalize_url(str(req.url)), summarized.summary,
+                                   variant=summary_variant(req.top_n), body_hash=summarized.body_hash,
+                                   checked_at=summarized.checked_at)
+        # 처리된 결과를 바로 반환 (웹페이지에 출력됨)
+        result = SummarizeResponse(summary=summarized.summary, cache="hit" if summarized.cache_hit else "miss")
 
-    # 처리된 결과를 바로 반환 (웹페이지에 출력됨)
-    return SummarizeResponse(summary=processed_result)
+    if response is not None:
+        response.headers["Server-Timing"] = server_timing_header(timings, time.perf_counter() - started)
+    return result
 
 @router.post("/summarize-form", response_model=SummarizeResponse)
-async def summarize_form(url: str = Form(...)):
-    return await summarize_news(SummarizeRequest(url=url))
+async def summarize_form(response: Response, url: str = Form(...)):
+    return await summarize_news(SummarizeRequest(url=url), response)
+
+@router.post("/summarize/batch")
+async def summarize_batch(req: BatchSummarizeRequest):
+    """
+    여러 URL을 한 번에 요약합니다.
+    기사는 호스트별 동시 요청 수를 제한해 병렬로 가져오고, 문장 임베딩은 임베딩 배처가
+    여러 기사의 문장을 묶어 공유 배치로 처리합니다.
+    결과는 끝나는 순서대로 한 줄씩 NDJSON으로 스트리밍하며, 실패는 항목별로 알려줍니다.
+    워커 풀이 가득 찬 항목은 BATCH_POOL_WAIT초까지 다시 시도한 뒤에야 실패로 알립니다.
+    """
+    urls = [str(url) for url in req.urls]
+    host_limits = {}
+    inflight = asyncio.Semaphore(BATCH_MAX_INFLIGHT)
+
+    async def _summarize_when_pool_free(url: str):
+        # 사람이 기다리는 요청이 아니므로 풀이 가득 차 있으면 바로 실패하지 않고 BATCH_POOL_WAIT까지 재시도
+        deadline = time.monotonic() + BATCH_POOL_WAIT
+        while True:
+            try:
+                return await summarize_url(url, req.top_n)
+            except PoolFullError:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise
+                await asyncio.sleep(min(SUMMARY_RETRY_AFTER * (0.5 + random.random()), remaining))
+
+    async def _summarize_one(index: int, url: str) -> dict:
+        host = urlsplit(url).hostname or ""
+        host_limit = host_limits.setdefault(host, asyncio.Semaphore(BATCH_PER_HOST_CONCURRENCY))
+        async with inflight, host_limit:
+            try:
+                summarized = await _summarize_when_pool_free(url)
+            except PoolFullError:
+                return {"index": index, "url": url, "ok": False, "error": "요약 작업 대기열이 가득 찼습니다."}
+            except ArticleExtractionError as e:
+                return {"index": index, "url": url, "ok": False, "error": e.article['본문']}
+            except Exception as e:
+                return {"index": index, "url": url, "ok": False, "error": f"요약 중 오류 발생: {e}"}
+        get_summary_store().append(canonicalize_url(url), summarized.summary,
+                                   variant=summary_variant(req.top_n), body_hash=summarized.body_hash,
+                                   checked_at=summarized.checked_at)
+        return {"index": index, "url": url, "ok": True, "summary": summarized.summary,
+                "cache": "hit" if summarized.cache_hit else "miss"}
+
+    async def _stream():
+        tasks = [asyncio.create_task(_summarize_one(i, url)) for i, url in enumerate(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+        finally:
+            # 클라이언트 연결이 끊기면 남은 작업 취소
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
+# 요약/문장 임베딩 캐시 적중률과 크기
+# 캐시는 프로세스마다 따로 있으므로 app.serve로 실행하면 응답한 워커(pid)의 값입니다. (합계는 /metrics)
+@router.get("/cache/stats")
+async def cache_stats():
+    pool = get_worker_pool()
+    if pool.kind == "process":
+        # 임베딩 캐시는 프로세스 풀의 자식에 있으므로 자식 하나의 값을 가져옴 (모든 자식의 조회 수 합계는 /metrics)
+        embedding = await pool.call_in_worker(embedding_cache_stats)
+    else:
+        embedding = await asyncio.to_thread(embedding_cache_stats)
+    return {
+        "pid": os.getpid(),
+        "summary": get_summary_cache().stats(),
+        "embedding": embedding,
+        "single_flight": summary_flights.stats(),
+    }
+
+# 지난 요약 기록 조회 (최신순, cursor 기반 페이지네이션)
+@router.get("/summaries")
+async def list_summaries(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[int] = None,
+    url: Optional[str] = None,
+):
+    url_key = canonicalize_url(url) if url else None
+    return await asyncio.to_thread(get_summary_store().list_summaries, limit, cursor, url_key)
@@ -0,0 +1,285 @@
+# summary_cache.py
+# 요약 결과 캐시 (메모리 LRU + 선택적 디스크 저장소)
+# URL(정규화)과 기사 본문 해시 두 가지 키로 요약 결과를 찾습니다.
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .metrics import CACHE_LOOKUPS
+
+# URL 키 유효 시간 (초) - 이 시간이 지나면 기사를 다시 가져와 본문이 바뀌었는지 확인
+SUMMARY_CACHE_TTL = float(os.environ.get("SUMMARY_CACHE_TTL", "600"))
+# 본문 해시 키 유효 시간 (초)
+SUMMARY_CONTENT_TTL = float(os.environ.get("SUMMARY_CONTENT_TTL", "86400"))
+# 메모리 캐시 최대 항목 수 / 최대 크기 (바이트)
+SUMMARY_CACHE_MAX_ENTRIES = int(os.environ.get("SUMMARY_CACHE_MAX_ENTRIES", "2048"))
+SUMMARY_CACHE_MAX_BYTES = int(os.environ.get("SUMMARY_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+# 디스크 캐시 파일 경로 (비워 두면 메모리 캐시만 사용)
+SUMMARY_CACHE_DB = os.environ.get("SUMMARY_CACHE_DB", "")
+# 디스크 캐시 최대 항목 수 (넘으면 가장 오래전에 기록한 항목부터 삭제)
+SUMMARY_CACHE_DB_MAX_ROWS = int(os.environ.get("SUMMARY_CACHE_DB_MAX_ROWS", "100000"))
+# 디스크 캐시에 이만큼 기록할 때마다 만료 항목 삭제와 항목 수 제한을 적용
+SUMMARY_CACHE_DB_PURGE_EVERY = int(os.environ.get("SUMMARY_CACHE_DB_PURGE_EVERY", "256"))
+
+# URL에서 제거할 추적용 쿼리 파라미터
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src",
+})
+TRACKING_PREFIXES = ("utm_",)
+# 같은 사이트로 취급할 호스트 접두어 (예: www.ytn.co.kr, m.ytn.co.kr -> ytn.co.kr)
+HOST_PREFIXES = ("www.", "m.", "mobile.")
+
+_whitespace_re = re.compile(r"\s+")
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    캐시 키로 쓸 수 있도록 URL을 정규화합니다.
+    - scheme은 https로 통일, 호스트는 소문자 + www./m. 접두어 제거, 기본 포트 제거
+    - 추적용 쿼리 파라미터(utm_* 등)와 fragment 제거, 나머지 쿼리는 정렬
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query.sort()
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+
+def content_hash(text: str) -> str:
+    """공백을 정규화한 본문 텍스트의 해시 값을 반환합니다."""
+    normalized = _whitespace_re.sub(" ", text or "").strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """항목 수와 전체 크기(바이트) 한도를 가진 TTL LRU 캐시 (스레드 안전)"""
+
+    def __init__(self, max_entries: int = SUMMARY_CACHE_MAX_ENTRIES, max_bytes: int = SUMMARY_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at, size = item
+            if expires_at < time.time():
+                del self._data[key]
+                self._bytes -= size
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value, ttl: float, size: int):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._data[key] = (value, time.time() + ttl, size)
+            self._bytes += size
+            # 오래 사용하지 않은 항목부터 제거
+            while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+
+class DiskCache:
+    """
+    재시작 후에도 유지되는 SQLite 기반 키-값 캐시
+    purge_every번 기록할 때마다 만료된 항목을 지우고 max_rows개를 넘는 오래된 항목을 삭제합니다.
+    """
+
+    def __init__(self, path: str, max_rows: int = SUMMARY_CACHE_DB_MAX_ROWS,
+                 purge_every: int = SUMMARY_CACHE_DB_PURGE_EVERY):
+        self.path = path
+        self.max_rows = max_rows
+        self.purge_every = max(1, purge_every)
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summary_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        # 이전 실행에서 남은 항목 정리
+        self.purge_expired()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM summary_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put(self, key, value, ttl: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summary_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time() + ttl),
+            )
+            self._conn.commit()
+            self._writes += 1
+            purge = self._writes % self.purge_every == 0
+        if purge:
+            self.purge_expired()
+
+    def purge_expired(self):
+        """만료된 항목을 지우고, 그래도 max_rows를 넘으면 가장 오래전에 기록한 항목부터 삭제합니다."""
+        with self._lock:
+            self._conn.execute("DELETE FROM summary_cache WHERE expires_at < ?", (time.time(),))
+            # INSERT OR REPLACE는 새 rowid를 받으므로 rowid가 작을수록 오래전에 기록한 항목
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM summary_cache").fetchone()
+            if count > self.max_rows:
+                self._conn.execute(
+                    "DELETE FROM summary_cache WHERE rowid IN "
+                    "(SELECT rowid FROM summary_cache ORDER BY rowid LIMIT ?)", (count - self.max_rows,)
+                )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SummaryCache:
+    """
+    요약 결과 캐시입니다.
+    - url 키: 정규화 URL -> {summary, body_hash, checked_at}. TTL 안에서는 기사를 다시 가져오지 않습니다.
+    - body 키: 본문 해시 -> summary. 본문이 바뀌지 않았다면 추론 없이 재사용합니다.
+    """
+
+    def __init__(self, memory: LRUCache = None, disk: DiskCache = None,
+                 url_ttl: float = SUMMARY_CACHE_TTL, content_ttl: float = SUMMARY_CONTENT_TTL):
+        self.memory = memory or LRUCache()
+        self.disk = disk
+        self.url_ttl = url_ttl
+        self.content_ttl = content_ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _get_from_disk(self, key):
+        found = self.disk.get(key)
+        if found is None:
+            return None
+        value, expires_at = found
+        # 디스크에서 찾은 항목은 남은 TTL만큼 메모리에도 올려 둠
+        self.memory.put(key, value, expires_at - time.time(), _value_size(value))
+        return value
+
+    async def _get(self, key):
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            # SQLite 조회는 이벤트 루프를 막지 않도록 스레드에서 실행
+            value = await asyncio.to_thread(self._get_from_disk, key)
+        return value
+
+    def _put_to_disk(self, items):
+        for key, value, ttl in items:
+            self.disk.put(key, value, ttl)
+
+    async def _put_many(self, items):
+        """(key, value, ttl) 목록을 메모리에 넣고, 디스크에는 스레드에서 기록합니다."""
+        for key, value, ttl in items:
+            self.memory.put(key, value, ttl, _value_size(value))
+        if self.disk is not None:
+            await asyncio.to_thread(self._put_to_disk, items)
+
+    # variant에는 요약 결과를 바꾸는 옵션(점수 계산기, top_n 등)을 넣어 키를 구분합니다.
+    async def get_by_url(self, url_key: str, variant: str = ""):
+        """URL 키로 찾은 {summary, body_hash, checked_at}을 반환합니다. 없으면 None"""
+        return await self._get(f"url:{variant}:{url_key}")
+
+    async def get_by_content(self, body_hash: str, variant: str = ""):
+        """본문 해시로 찾은 요약 문자열을 반환합니다. 없으면 None"""
+        value = await self._get(f"body:{variant}:{body_hash}")
+        return value["summary"] if value is not None else None
+
+    async def put(self, url_key: str, body_hash: str, summary: str, variant: str = "", checked_at: float = None):
+        """
+        요약을 URL 키와 본문 해시 키로 저장합니다.
+        checked_at(epoch 초)은 기사를 실제로 가져와 본문을 확인한 시각으로, URL 키는 그때부터 url_ttl 동안만 유지합니다.
+        """
+        checked_at = checked_at or time.time()
+        url_ttl = self.url_ttl - (time.time() - checked_at)
+        await self._put_many([
+            (f"url:{variant}:{url_key}", {"summary": summary, "body_hash": body_hash, "checked_at": checked_at},
+             url_ttl),
+            (f"body:{variant}:{body_hash}", {"summary": summary}, self.content_ttl),
+        ])
+
+    def record(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        CACHE_LOOKUPS.labels("summary", "hit" if hit else "miss").inc()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.memory),
+            "bytes": self.memory.size_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "disk": self.disk.path if self.disk is not None else None,
+        }
+
+
+def _value_size(value) -> int:
+    return sum(len(str(v).encode("utf-8")) for v in value.values()) + 64
+
+
+# 프로세스 전역 요약 캐시
+_cache = None
+
+
+def get_summary_cache() -> SummaryCache:
+    global _cache
+    if _cache is None:
+        disk = DiskCache(SUMMARY_CACHE_DB) if SUMMARY_CACHE_DB else None
+        _cache = SummaryCache(disk=disk)
+    return _cache
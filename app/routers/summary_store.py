@@ -0,0 +1,209 @@
+# summary_store.py
+# 요약 기록 저장소 (SQLite WAL 모드, 요청 경로 밖에서 일괄 기록)
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from .metrics import stage, track_queue_depth
+
+logger = logging.getLogger(__name__)
+
+# 요약 기록 DB 파일 경로
+SUMMARY_DB_PATH = os.environ.get("SUMMARY_DB_PATH", "summaries.db")
+# 한 번의 트랜잭션으로 기록할 최대 건수
+SUMMARY_WRITE_BATCH = int(os.environ.get("SUMMARY_WRITE_BATCH", "64"))
+# 새 기록을 모으기 위해 기다리는 최대 시간 (초)
+SUMMARY_WRITE_INTERVAL = float(os.environ.get("SUMMARY_WRITE_INTERVAL", "0.5"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    variant TEXT,
+    body_hash TEXT,
+    checked_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_summaries_url ON summaries (url);
+CREATE INDEX IF NOT EXISTS idx_summaries_created_at ON summaries (created_at);
+"""
+
+# 나중에 추가한 열 (이전 버전으로 만든 DB에는 ALTER TABLE로 추가)
+# variant: 점수 계산기와 문장 수 ("scorer:top_n"), body_hash: 기사 본문 해시,
+# checked_at: 기사를 실제로 가져와 본문을 확인한 시각 (캐시 적중으로 남긴 기록은 처음 확인한 시각). 다른 워커/크롤러의 요약을 재사용할 때 사용
+_ADDED_COLUMNS = {"variant": "TEXT", "body_hash": "TEXT", "checked_at": "REAL"}
+_ADDED_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_summaries_url_variant ON summaries (url, variant);
+CREATE INDEX IF NOT EXISTS idx_summaries_body_hash ON summaries (body_hash, variant);
+"""
+
+# 쓰기 스레드 종료 신호
+_STOP = object()
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _migrate(conn: sqlite3.Connection):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(summaries)")}
+    for name, column_type in _ADDED_COLUMNS.items():
+        if name not in columns:
+            conn.execute(f"ALTER TABLE summaries ADD COLUMN {name} {column_type}")
+    conn.executescript(_ADDED_INDEXES)
+
+
+class SummaryStore:
+    """
+    요약 기록을 SQLite에 추가만 하는(append-only) 저장소입니다.
+    append()는 큐에 넣고 바로 반환하며, 별도 쓰기 스레드가 모아서 한 번에 INSERT 합니다.
+    읽기는 WAL 모드 덕분에 쓰기와 동시에 할 수 있습니다.
+    """
+
+    def __init__(self, path: str = SUMMARY_DB_PATH):
+        self.path = path
+        conn = _connect(path)
+        conn.executescript(_SCHEMA)
+        _migrate(conn)
+        conn.commit()
+        self._read_conn = conn
+        self._read_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        track_queue_depth("summary_store", self._queue.qsize)
+
+    def start(self):
+        """쓰기 스레드를 시작합니다. (이미 실행 중이면 아무것도 하지 않음)"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="summary-store-writer", daemon=True)
+                self._thread.start()
+
+    def append(self, url: str, summary: str, created_at: float = None, variant: str = None, body_hash: str = None,
+               checked_at: float = None):
+        """요약 기록을 쓰기 대기열에 추가합니다. (요청 경로를 막지 않음)"""
+        self.start()
+        self._queue.put((url, summary, created_at or time.time(), variant, body_hash, checked_at))
+
+    def _run(self):
+        conn = _connect(self.path)
+        stopping = False
+        while not stopping:
+            rows = []
+            item = self._queue.get()
+            deadline = time.monotonic() + SUMMARY_WRITE_INTERVAL
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                rows.append(item)
+                if len(rows) >= SUMMARY_WRITE_BATCH:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if rows:
+                try:
+                    with stage("persist"), conn:
+                        conn.executemany(
+                            "INSERT INTO summaries (url, summary, created_at, variant, body_hash, checked_at) "
+                            "VALUES (?, ?, ?, ?, ?, ?)",
+                            rows,
+                        )
+                except sqlite3.Error as e:
+                    logger.error("요약 기록 저장 중 오류 발생 (%d건): %s", len(rows), e)
+        conn.close()
+
+    def close(self):
+        """대기 중인 기록을 모두 저장한 뒤 쓰기 스레드를 종료합니다."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._thread = None
+
+    def list_summaries(self, limit: int = 20, cursor: int = None, url: str = None) -> dict:
+        """
+        최근 요약 기록을 최신순으로 반환합니다. (키셋 페이지네이션)
+        cursor에는 이전 응답의 next_cursor를 넘기면 그 다음 페이지를 가져옵니다.
+        """
+        sql = "SELECT id, url, summary, created_at FROM summaries"
+        conditions, params = [], []
+        if url is not None:
+            conditions.append("url = ?")
+            params.append(url)
+        if cursor is not None:
+            conditions.append("id < ?")
+            params.append(cursor)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+
+        with self._read_lock:
+            rows = self._read_conn.execute(sql, params).fetchall()
+        items = [
+            {"id": row[0], "url": row[1], "summary": row[2], "created_at": row[3]}
+            for row in rows
+        ]
+        next_cursor = items[-1]["id"] if len(items) == limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def recent_urls(self, limit: int = 1000) -> list:
+        """가장 최근에 요약이 기록된 URL을 최신순으로 최대 limit개 반환합니다. (중복 제외)"""
+        with self._read_lock:
+            rows = self._read_conn.execute(
+                "SELECT url FROM summaries GROUP BY url ORDER BY MAX(id) DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _latest(self, column: str, value: str, variant: str, since: float):
+        with self._read_lock:
+            row = self._read_conn.execute(
+                f"SELECT summary, body_hash, checked_at FROM summaries "
+                f"WHERE {column} = ? AND variant = ? AND checked_at >= ? ORDER BY id DESC LIMIT 1",
+                (value, variant, since),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"summary": row[0], "body_hash": row[1], "checked_at": row[2]}
+
+    def latest_for_url(self, url: str, variant: str, since: float = 0.0):
+        """
+        url(정규화)과 variant가 같은 요약 중 since(epoch 초) 이후에 기사를 확인한 가장 최근 것을 반환합니다. (없으면 None)
+        캐시 적중으로 남긴 기록은 처음 확인한 시각을 가지므로, 자주 조회되는 URL도 TTL이 지나면 다시 가져옵니다.
+        """
+        return self._latest("url", url, variant, since)
+
+    def latest_for_content(self, body_hash: str, variant: str, since: float = 0.0):
+        """본문 해시와 variant가 같은 요약 중 since(epoch 초) 이후에 기사를 확인한 가장 최근 것을 반환합니다. (없으면 None)"""
+        return self._latest("body_hash", body_hash, variant, since)
+
+
+# 프로세스 전역 요약 저장소
+_store = None
+
+
+def get_summary_store() -> SummaryStore:
+    global _store
+    if _store is None:
+        _store = SummaryStore()
+    return _store
+
+
+def close_summary_store():
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
@@ -0,0 +1,121 @@
+# trending.py
+# 실시간 인기 뉴스 RSS를 백그라운드에서 주기적으로 가져와 메모리에 보관하는 스냅샷
+import asyncio
+import logging
+import os
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+
+import httpx
+
+from .http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+# 인기 뉴스 RSS 주소 (테스트 시 로컬 서버 주소로 바꿀 수 있음)
+TRENDING_RSS_URL = os.environ.get("TRENDING_RSS_URL", "https://news-ex.jtbc.co.kr/v1/get/rss/issue")
+# RSS를 다시 가져오는 주기 (초)
+TRENDING_REFRESH_INTERVAL = float(os.environ.get("TRENDING_REFRESH_INTERVAL", "60"))
+# 마지막 갱신 후 이 시간이 지나면 오래된(stale) 데이터로 표시 (초)
+TRENDING_STALE_AFTER = float(os.environ.get("TRENDING_STALE_AFTER", str(TRENDING_REFRESH_INTERVAL * 3)))
+# 첫 스냅샷이 준비될 때까지 요청이 기다리는 최대 시간 (초)
+TRENDING_INITIAL_WAIT = float(os.environ.get("TRENDING_INITIAL_WAIT", "10"))
+
+
+def parse_rss_titles(text: str) -> tuple:
+    """RSS XML에서 뉴스 제목 목록을 ({"title": ...}, ...) 튜플로 반환합니다."""
+    root = ET.fromstring(text)
+    channel = root.find("channel")
+    items = channel.findall("item") if channel is not None else []
+    trending = []
+    for item in items:
+        title_el = item.find("title")
+        if title_el is not None and title_el.text:
+            trending.append({"title": title_el.text})
+    return tuple(trending)
+
+
+class TrendingSnapshot:
+    """
+    파싱이 끝난 인기 뉴스 목록을 들고 있다가 요청이 오면 바로 잘라서 돌려줍니다.
+    갱신에 실패하면 이전 목록을 그대로 두고 stale로 표시합니다.
+    """
+
+    def __init__(self, url: str = TRENDING_RSS_URL, interval: float = TRENDING_REFRESH_INTERVAL,
+                 stale_after: float = TRENDING_STALE_AFTER):
+        self.url = url
+        self.interval = interval
+        self.stale_after = stale_after
+        self.items = None          # 파싱된 뉴스 제목 튜플 (아직 한 번도 못 가져왔으면 None)
+        self.updated_at = None     # 마지막으로 upstream에서 확인한 시각 (epoch 초)
+        self.last_error = None
+        self._ready = asyncio.Event()
+        self._task = None
+
+    async def refresh(self):
+        """RSS를 조건부 GET으로 가져와 바뀌었을 때만 다시 파싱합니다."""
+        try:
+            result = await get_http_client().fetch(self.url)
+            if not result.not_modified or self.items is None:
+                self.items = parse_rss_titles(result.text)
+            self.updated_at = time.time()
+            self.last_error = None
+        except (httpx.HTTPError, ET.ParseError) as e:
+            self.last_error = str(e)
+            logger.warning("인기 뉴스 RSS 갱신 실패: %s", e)
+        finally:
+            self._ready.set()
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def wait_ready(self, timeout: float = TRENDING_INITIAL_WAIT):
+        """첫 갱신 시도가 끝날 때까지 기다립니다."""
+        if not self._ready.is_set():
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    @property
+    def stale(self) -> bool:
+        if self.updated_at is None:
+            return True
+        return self.last_error is not None or time.time() - self.updated_at > self.stale_after
+
+    def get(self, top_n: int) -> dict:
+        """상위 top_n개 뉴스 제목과 갱신 시각, stale 여부를 반환합니다."""
+        updated_at = (datetime.fromtimestamp(self.updated_at, timezone.utc).isoformat()
+                      if self.updated_at is not None else None)
+        return {
+            "trending": list(self.items[:top_n]) if self.items else [],
+            "updated_at": updated_at,
+            "stale": self.stale,
+        }
+
+
+# 앱 전역 인기 뉴스 스냅샷
+_snapshot = None
+
+
+def get_trending_snapshot() -> TrendingSnapshot:
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = TrendingSnapshot()
+    return _snapshot
@@ -0,0 +1,243 @@
+# weather.py
+# 네이버 검색의 날씨 위젯(div.temperature_text, div.temperature_info)을 지역별로 가져와 캐시하는 서비스
+# crawling/weather_crawling.ipynb의 파싱을 옮긴 것입니다.
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+import httpx
+from bs4 import BeautifulSoup, SoupStrainer
+
+from .extractors import HTML_PARSER
+from .http_client import get_http_client
+from .metrics import CACHE_LOOKUPS, stage
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# 날씨 검색 주소 (테스트 시 로컬 서버 주소로 바꿀 수 있음, 뒤에 ?query=<지역> 날씨 가 붙음)
+WEATHER_BASE_URL = os.environ.get("WEATHER_BASE_URL", "https://search.naver.com/search.naver")
+# 지역 이름을 주지 않았을 때 사용할 지역
+WEATHER_DEFAULT_REGION = os.environ.get("WEATHER_DEFAULT_REGION", "서울")
+# 가져온 날씨를 재사용하는 시간 (초)
+WEATHER_TTL = float(os.environ.get("WEATHER_TTL", "600"))
+# 찾지 못한 지역 이름을 다시 조회하지 않고 바로 WeatherNotFound로 응답하는 시간 (초)
+WEATHER_NOT_FOUND_TTL = float(os.environ.get("WEATHER_NOT_FOUND_TTL", "60"))
+# 캐시에 보관할 최대 지역 수 (넘으면 가장 오래 안 쓴 지역부터 제거)
+WEATHER_CACHE_MAX_REGIONS = int(os.environ.get("WEATHER_CACHE_MAX_REGIONS", "256"))
+# 동시에 보낼 수 있는 최대 upstream 요청 수
+WEATHER_MAX_UPSTREAM = int(os.environ.get("WEATHER_MAX_UPSTREAM", "4"))
+# 많이 조회된 지역을 미리 갱신하는 주기 (초)와 갱신할 지역 수
+WEATHER_REFRESH_INTERVAL = float(os.environ.get("WEATHER_REFRESH_INTERVAL", "300"))
+WEATHER_REFRESH_TOP = int(os.environ.get("WEATHER_REFRESH_TOP", "5"))
+
+WEATHER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+}
+
+# 위젯 부분만 파싱 (검색 결과 페이지 전체를 트리로 만들지 않음)
+_weather_strainer = SoupStrainer("div", attrs={"class": ["temperature_text", "temperature_info"]})
+_number = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+class WeatherNotFound(Exception):
+    """검색 결과에 날씨 위젯이 없는 경우 (지역 이름을 찾지 못함)"""
+
+
+def normalize_region(region: str) -> str:
+    """앞뒤 공백을 없애고 연속된 공백을 하나로 합칩니다. (캐시 키로 사용)"""
+    return " ".join(region.split())
+
+
+def parse_weather(html: str) -> dict:
+    """
+    날씨 위젯에서 현재 기온, 날씨 상태, 어제와의 비교, 체감/습도/바람 항목을 꺼냅니다.
+    위젯이 없으면 WeatherNotFound를 발생시킵니다.
+    """
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=_weather_strainer)
+    text_div = soup.find("div", class_="temperature_text")
+    strong = text_div.find("strong") if text_div is not None else None
+    if strong is None:
+        raise WeatherNotFound("날씨 정보를 찾을 수 없습니다.")
+    # <strong><span class="blind">현재 온도</span>22.4<span class="celsius">°</span></strong>
+    for span in strong.find_all("span", class_="blind"):
+        span.extract()
+    match = _number.search(strong.get_text())
+    temperature = float(match.group()) if match else None
+
+    condition, summary, details = None, None, {}
+    # 첫 번째 temperature_info가 현재 날씨 (이후는 예보)
+    info = soup.find("div", class_="temperature_info")
+    if info is not None:
+        weather = info.find("span", class_="weather")
+        if weather is not None:
+            condition = weather.get_text(strip=True)
+            weather.extract()
+        summary_p = info.find("p", class_="summary")
+        if summary_p is not None:
+            summary = summary_p.get_text(" ", strip=True) or None
+        for term in info.find_all("dt"):
+            desc = term.find_next_sibling("dd")
+            if desc is not None:
+                details[term.get_text(strip=True)] = desc.get_text(strip=True)
+
+    return {"temperature": temperature, "condition": condition, "summary": summary, "details": details}
+
+
+class WeatherService:
+    """
+    지역별 날씨를 TTL 동안 캐시합니다.
+    같은 지역의 동시 요청은 upstream 요청 하나로 합치고, 전체 upstream 요청 수는 세마포어로 제한합니다.
+    많이 조회된 지역은 백그라운드에서 만료 전에 미리 갱신하고, 갱신에 실패하면 이전 값을 stale로 돌려줍니다.
+    """
+
+    def __init__(self, base_url: str = WEATHER_BASE_URL, ttl: float = WEATHER_TTL,
+                 not_found_ttl: float = WEATHER_NOT_FOUND_TTL, max_regions: int = WEATHER_CACHE_MAX_REGIONS,
+                 max_upstream: int = WEATHER_MAX_UPSTREAM,
+                 refresh_interval: float = WEATHER_REFRESH_INTERVAL, refresh_top: int = WEATHER_REFRESH_TOP):
+        self.base_url = base_url
+        self.ttl = ttl
+        self.not_found_ttl = not_found_ttl
+        self.max_regions = max_regions
+        self.refresh_interval = refresh_interval
+        self.refresh_top = refresh_top
+        self._entries = OrderedDict()   # 지역 -> (날씨 dict, 가져온 시각 epoch 초)
+        self._not_found = OrderedDict() # 찾지 못한 지역 -> 다시 조회할 수 있는 시각 (epoch 초)
+        self._flights = SingleFlight("weather")
+        self._upstream = asyncio.Semaphore(max(1, max_upstream))
+        self._requests = Counter()      # 지역별 조회 수 (백그라운드 갱신 대상 선정용)
+        self._task = None
+        self.refreshed = 0              # 백그라운드에서 갱신한 횟수
+
+    def url_for(self, region: str) -> str:
+        return f"{self.base_url}?{urlencode({'where': 'nexearch', 'ie': 'utf8', 'query': f'{region} 날씨'})}"
+
+    async def _fetch(self, region: str) -> tuple:
+        async with self._upstream:
+            with stage("weather_fetch"):
+                result = await get_http_client().fetch(self.url_for(region), WEATHER_HEADERS, conditional=False)
+        # 검색 결과 페이지가 커서 파싱은 스레드에서 실행
+        try:
+            weather = await asyncio.to_thread(parse_weather, result.text)
+        except WeatherNotFound:
+            self._not_found[region] = time.time() + self.not_found_ttl
+            self._not_found.move_to_end(region)
+            while len(self._not_found) > self.max_regions:
+                self._not_found.popitem(last=False)
+            raise
+        self._not_found.pop(region, None)
+        entry = (weather, time.time())
+        self._entries[region] = entry
+        self._entries.move_to_end(region)
+        while len(self._entries) > self.max_regions:
+            self._entries.popitem(last=False)
+        return entry
+
+    def _response(self, region: str, weather: dict, fetched_at: float, stale: bool) -> dict:
+        return {
+            "region": region,
+            **weather,
+            "updated_at": datetime.fromtimestamp(fetched_at, timezone.utc).isoformat(),
+            "stale": stale,
+        }
+
+    def _count(self, region: str):
+        self._requests[region] += 1
+        # 처음 보는 지역 이름이 계속 들어와도 집계가 끝없이 커지지 않도록 상위 지역만 남김
+        if len(self._requests) > self.max_regions * 2:
+            self._requests = Counter(dict(self._requests.most_common(self.max_regions)))
+
+    async def get(self, region: str) -> dict:
+        """
+        region의 날씨를 반환합니다. 캐시가 만료됐으면 upstream에서 다시 가져옵니다.
+        갱신에 실패하면 이전 값을 stale로 돌려주고, 이전 값이 없으면
+        지역을 찾지 못한 경우 WeatherNotFound(not_found_ttl 동안 기억), upstream이 실패한 경우 httpx.HTTPError를 발생시킵니다.
+        """
+        region = normalize_region(region)
+        now = time.time()
+        entry = self._entries.get(region)
+        if entry is not None and now - entry[1] < self.ttl:
+            CACHE_LOOKUPS.labels("weather", "hit").inc()
+            self._entries.move_to_end(region)
+            self._count(region)
+            return self._response(region, *entry, stale=False)
+        # 최근에 찾지 못한 지역은 upstream에 다시 묻지 않음 (이전 값이 있으면 stale로 응답)
+        if self._not_found.get(region, 0) > now:
+            CACHE_LOOKUPS.labels("weather", "hit").inc()
+            if entry is None:
+                raise WeatherNotFound("날씨 정보를 찾을 수 없습니다.")
+            self._count(region)
+            return self._response(region, *entry, stale=True)
+
+        CACHE_LOOKUPS.labels("weather", "miss").inc()
+        try:
+            fresh = await self._flights.do(region, self._fetch, region)
+        except (httpx.HTTPError, WeatherNotFound) as e:
+            # 페이지 구조가 잠시 바뀌어 위젯을 찾지 못한 경우도 이전 값이 있으면 그대로 사용
+            if entry is None:
+                raise
+            logger.warning("'%s' 날씨 갱신 실패, 이전 값을 사용합니다: %s", region, e)
+            self._count(region)
+            return self._response(region, *entry, stale=True)
+        # 찾지 못한 지역 이름은 집계하지 않음 (백그라운드 갱신 대상에서 제외)
+        self._count(region)
+        return self._response(region, *fresh, stale=False)
+
+    async def refresh_popular(self):
+        """많이 조회된 지역 중 다음 갱신 전에 만료될 지역을 미리 가져옵니다."""
+        now = time.time()
+        for region, _ in self._requests.most_common(self.refresh_top):
+            entry = self._entries.get(region)
+            if entry is not None and now - entry[1] < self.ttl - self.refresh_interval:
+                continue
+            try:
+                await self._flights.do(region, self._fetch, region)
+                self.refreshed += 1
+            except (httpx.HTTPError, WeatherNotFound) as e:
+                logger.warning("'%s' 날씨 백그라운드 갱신 실패: %s", region, e)
+        # 오래전에 많이 조회된 지역보다 최근에 많이 조회된 지역이 우선되도록 조회 수를 절반으로 줄임
+        self._requests = Counter({region: count // 2 for region, count in self._requests.items() if count > 1})
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh_popular()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "regions": len(self._entries),
+            "not_found": len(self._not_found),
+            "refreshed": self.refreshed,
+            "popular": [region for region, _ in self._requests.most_common(self.refresh_top)],
+            "single_flight": self._flights.stats(),
+        }
+
+
+# 앱 전역 날씨 서비스
+_service = None
+
+
+def get_weather_service() -> WeatherService:
+    global _service
+    if _service is None:
+        _service = WeatherService()
+    return _service
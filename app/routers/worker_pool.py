@@ -0,0 +1,155 @@
+# worker_pool.py
+# 요약 파이프라인(HTML 파싱 + KoBERT 추론)을 이벤트 루프 밖에서 실행하기 위한 제한된 워커 풀
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .metrics import record_cache_lookup, record_stage, run_with_timings, track_queue_depth
+from .model_runtime import ModelRuntime, load_model_runtime, model_runtime_status
+
+# 풀 종류: "thread" 또는 "process"
+SUMMARY_POOL_KIND = os.environ.get("SUMMARY_POOL_KIND", "thread")
+# 동시에 실행할 워커 수
+SUMMARY_POOL_WORKERS = int(os.environ.get("SUMMARY_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+# 실행 중인 작업 외에 대기할 수 있는 작업 수
+SUMMARY_POOL_QUEUE = int(os.environ.get("SUMMARY_POOL_QUEUE", "16"))
+# 풀이 가득 찼을 때 클라이언트에 알려줄 재시도 대기 시간 (초)
+SUMMARY_RETRY_AFTER = int(os.environ.get("SUMMARY_RETRY_AFTER", "5"))
+
+
+def _init_process_worker():
+    # spawn으로 시작한 자식 프로세스는 부모의 로그 설정을 물려받지 않으므로 다시 설정한 뒤 모델 로드
+    from .embedding_cache import get_embedding_cache
+    from .log_config import configure_logging
+
+    configure_logging()
+    runtime = load_model_runtime()
+    # 첫 요약 전에도 /api/cache/stats가 이 자식의 임베딩 캐시 상태를 보여줄 수 있도록 미리 생성
+    get_embedding_cache(runtime.cache_namespace, runtime.model.config.hidden_size)
+
+
+def _worker_runtime_status() -> dict:
+    return load_model_runtime().status()
+
+
+class PoolFullError(Exception):
+    """대기열이 가득 차서 작업을 받을 수 없을 때 발생합니다."""
+
+
+class BoundedWorkerPool:
+    """
+    스레드/프로세스 풀 앞에 대기열 한도를 둔 래퍼입니다.
+    실행 중 + 대기 중 작업 수가 max_workers + max_queue를 넘으면 PoolFullError를 발생시킵니다.
+    """
+
+    def __init__(self, kind: str = SUMMARY_POOL_KIND, max_workers: int = SUMMARY_POOL_WORKERS,
+                 max_queue: int = SUMMARY_POOL_QUEUE):
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        if kind == "process":
+            # 각 프로세스는 시작할 때 모델을 한 번만 로드 (부모 프로세스는 모델을 로드하지 않음)
+            # fork로 만들면 부모에서 모델을 로드하던 스레드가 잡고 있던 잠금까지 복사되어 자식이 멈출 수 있으므로 spawn 사용
+            self._executor = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_process_worker,
+            )
+        elif kind == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summary-worker")
+        else:
+            raise ValueError(f"알 수 없는 풀 종류입니다: {kind}")
+        self._pending = 0
+        self._lock = threading.Lock()
+        # 프로세스 풀 자식의 모델 상태 (warm_up이 채움)
+        self.runtime_status = ModelRuntime().status()
+        track_queue_depth("summary_pool", lambda: self._pending)
+
+    @property
+    def pending(self) -> int:
+        """실행 중이거나 대기 중인 작업 수"""
+        return self._pending
+
+    @property
+    def is_full(self) -> bool:
+        return self._pending >= self.max_workers + self.max_queue
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        fn을 풀에서 실행하고 결과를 기다립니다. 풀이 가득 찼으면 PoolFullError를 발생시킵니다.
+        작업 안에서 잰 단계 시간(대기 시간 포함)과 캐시 조회 수는 작업이 끝난 뒤 이 프로세스의 지표에 기록합니다.
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                raise PoolFullError(f"요약 작업 대기열이 가득 찼습니다 ({self._pending}건 처리 중)")
+            self._pending += 1
+        try:
+            future = self._executor.submit(run_with_timings, fn, time.monotonic(), *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        # 대기 중인 요청이 취소돼도 작업이 끝날 때 슬롯이 반환되도록 완료 콜백에서 카운트 감소
+        future.add_done_callback(self._release)
+        result, timings, lookups = await asyncio.wrap_future(future)
+        for name, seconds in timings.items():
+            record_stage(name, seconds)
+        for (cache, outcome), count in lookups.items():
+            record_cache_lookup(cache, outcome, count)
+        return result
+
+    async def call_in_worker(self, fn, *args):
+        """
+        대기열 한도와 계측 없이 fn을 워커에서 실행합니다. (자식 프로세스에 있는 캐시 상태 조회 등)
+        프로세스 풀이면 쉬는 자식 중 하나에서 실행되므로 그 자식의 값입니다.
+        """
+        return await asyncio.wrap_future(self._executor.submit(fn, *args))
+
+    async def warm_up(self) -> dict:
+        """
+        프로세스 풀의 워커를 모두 띄우고 모델 로드가 끝날 때까지 기다립니다.
+        결과(자식 프로세스의 모델 상태)는 runtime_status에 남깁니다.
+        """
+        self.runtime_status = {**self.runtime_status, "state": "loading"}
+        try:
+            # 쉬는 워커가 없으면 submit할 때마다 새 프로세스가 생기므로 워커 수만큼 제출
+            futures = [self._executor.submit(_worker_runtime_status) for _ in range(self.max_workers)]
+            statuses = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+        except Exception as e:
+            self.runtime_status = {**self.runtime_status, "state": "failed", "error": str(e)}
+            raise
+        self.runtime_status = statuses[0]
+        return self.runtime_status
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# 프로세스 전역 워커 풀
+_pool = None
+
+
+def get_worker_pool() -> BoundedWorkerPool:
+    global _pool
+    if _pool is None:
+        _pool = BoundedWorkerPool()
+    return _pool
+
+
+def summary_runtime_status() -> dict:
+    """요약을 실제로 처리하는 쪽의 모델 상태 (프로세스 풀이면 자식 프로세스, 아니면 이 프로세스)"""
+    if SUMMARY_POOL_KIND == "process":
+        return get_worker_pool().runtime_status
+    return model_runtime_status()
+
+
+def shutdown_worker_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
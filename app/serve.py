@@ -0,0 +1,297 @@
+# serve.py
+# 요약 모델을 마스터 프로세스에서 한 번만 로드한 뒤 fork해서 여러 uvicorn 워커를 띄우는 실행 모드
+#
+#   python -m app.serve --workers 4 --port 8000
+#
+# 워커들은 fork 시점의 모델 가중치를 copy-on-write로 공유합니다. (추론은 가중치를 고쳐 쓰지 않음)
+# 그래서 워커를 늘려도 워커마다 늘어나는 메모리는 요청 처리에 쓰는 만큼뿐이고,
+# 새 워커는 모델을 다시 읽지 않으므로 바로 요청을 받을 수 있습니다.
+# (uvicorn --workers는 spawn 방식이라 워커마다 모델을 따로 로드합니다.)
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import select
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+import uvicorn
+
+# 기본 바인드 주소와 워커 수
+SERVE_HOST = os.environ.get("SERVE_HOST", "127.0.0.1")
+SERVE_PORT = int(os.environ.get("SERVE_PORT", "8000"))
+SERVE_WORKERS = int(os.environ.get("SERVE_WORKERS", str(os.cpu_count() or 1)))
+# 종료 신호를 보낸 뒤 워커가 끝나기를 기다리는 최대 시간 (초)
+SERVE_GRACEFUL_TIMEOUT = float(os.environ.get("SERVE_GRACEFUL_TIMEOUT", "30"))
+# fork 후 이 시간(초) 안에 죽은 워커는 비정상 종료로 보고 다시 띄우기 전에 기다림 (지수 백오프)
+SERVE_MIN_UPTIME = float(os.environ.get("SERVE_MIN_UPTIME", "10"))
+SERVE_RESTART_BACKOFF = float(os.environ.get("SERVE_RESTART_BACKOFF", "0.5"))
+SERVE_RESTART_BACKOFF_MAX = float(os.environ.get("SERVE_RESTART_BACKOFF_MAX", "30"))
+# 연속으로 이만큼 빨리 죽으면 다시 띄우지 않고 서버를 종료
+SERVE_CRASH_LIMIT = int(os.environ.get("SERVE_CRASH_LIMIT", "10"))
+
+logger = logging.getLogger("app.serve")
+
+
+def process_memory_mb(pid: int) -> dict:
+    """
+    프로세스의 RSS와 USS(다른 프로세스와 공유하지 않는 메모리)를 MB로 반환합니다.
+    리눅스 /proc/<pid>/smaps_rollup을 읽을 수 없으면 빈 dict를 반환합니다.
+    """
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in ("Rss", "Private_Clean", "Private_Dirty"):
+                    values[name] = int(rest.split()[0]) / 1024
+    except OSError:
+        return {}
+    return {"rss_mb": values.get("Rss", 0.0),
+            "uss_mb": values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0)}
+
+
+class PreforkServer:
+    """
+    마스터는 모델 로드 -> 소켓 바인드 -> 워커 fork 순서로 시작하고,
+    워커가 준비될 때마다 걸린 시간과 메모리를 기록합니다. 죽은 워커는 다시 띄웁니다.
+    """
+
+    def __init__(self, host: str = SERVE_HOST, port: int = SERVE_PORT, workers: int = SERVE_WORKERS,
+                 ready_file: str = None, log_level: str = "warning"):
+        self.host = host
+        self.port = port
+        self.num_workers = max(1, workers)
+        self.ready_file = ready_file
+        self.log_level = log_level
+        self.started = time.perf_counter()
+        self.workers = {}      # pid -> fork 시각
+        self.ready = set()     # 준비를 마친 워커 pid
+        self.stopping = False
+        self.exit_code = 0
+        self.crashes = 0       # 연속으로 SERVE_MIN_UPTIME 안에 죽은 횟수
+        self._respawn_at = []  # 다시 띄울 워커의 예정 시각 (perf_counter)
+        self.app = None
+        self.model_preloaded = False
+        self.sock = None
+        self.metrics_dir = None  # 이 서버가 만든 Prometheus 멀티프로세스 폴더 (종료 시 삭제)
+        self._ready_read = self._ready_write = None
+
+    def prepare_metrics_dir(self):
+        """
+        워커별 지표를 합산할 수 있도록 PROMETHEUS_MULTIPROC_DIR을 준비합니다. (앱을 import하기 전에 호출)
+        직접 지정한 폴더는 이전 실행의 값이 섞이지 않도록 비우고, 없으면 임시 폴더를 만듭니다.
+        """
+        directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            for name in os.listdir(directory):
+                if name.endswith(".db"):
+                    os.remove(os.path.join(directory, name))
+        else:
+            directory = self.metrics_dir = tempfile.mkdtemp(prefix="modernnews-metrics-")
+            os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+
+    def preload(self):
+        """앱과 모델을 마스터에서 미리 로드합니다. 이후 만들어진 객체만 워커별로 따로 생깁니다."""
+        from app.main import app
+        from app.routers.model_runtime import load_model_runtime
+        from app.routers.worker_pool import SUMMARY_POOL_KIND
+
+        self.app = app
+        if SUMMARY_POOL_KIND == "process":
+            # 프로세스 풀을 쓰면 추론은 각 워커의 자식 프로세스가 하므로 마스터에서 모델을 로드하지 않음
+            logger.info("SUMMARY_POOL_KIND=process: 모델은 워커의 프로세스 풀에서 로드합니다")
+            return
+        runtime = load_model_runtime()
+        self.model_preloaded = True
+        # 마스터에 남은 객체를 GC 대상에서 빼서, 워커의 GC가 공유 페이지를 건드려 복사되지 않도록 함
+        gc.collect()
+        gc.freeze()
+        memory = process_memory_mb(os.getpid())
+        logger.info("마스터에서 모델 '%s' 로드 완료 (%.2f초, RSS %.0f MB)",
+                    runtime.model_name, runtime.load_seconds, memory.get("rss_mb", 0.0))
+
+    def bind(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        self.sock = sock
+        self.port = sock.getsockname()[1]
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                exit_code = self._run_worker()
+            except BaseException:
+                logger.exception("워커 %d 실행 중 오류 발생", os.getpid())
+            finally:
+                os._exit(exit_code)
+        self.workers[pid] = time.perf_counter()
+        return pid
+
+    def _run_worker(self) -> int:
+        # 마스터의 신호 처리기는 워커에서 쓰지 않음 (uvicorn이 자체 처리기를 설치)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        os.close(self._ready_read)
+        self.app.state.started_at = time.perf_counter()
+        self._limit_inference_threads()
+
+        config = uvicorn.Config(self.app, log_level=self.log_level, lifespan="on")
+        server = uvicorn.Server(config)
+
+        async def _serve():
+            task = asyncio.create_task(server.serve(sockets=[self.sock]))
+            while not server.started and not task.done():
+                await asyncio.sleep(0.05)
+            if server.started:
+                # 마스터에게 startup 이벤트까지 끝났다고 알림
+                os.write(self._ready_write, f"{os.getpid()}\n".encode())
+            await task
+
+        asyncio.run(_serve())
+        return 0
+
+    def _limit_inference_threads(self):
+        # 워커 수만큼 코어를 나눠 쓰도록 연산 스레드 수 조정 (SUMMARY_INTRA_OP_THREADS로 직접 지정하면 그 값 사용)
+        # ONNX 백엔드는 워커에서 세션을 다시 만들어야 하므로 지정한 경우에도 호출
+        if not self.model_preloaded:
+            return
+        from app.routers.inference_backends import SUMMARY_INTRA_OP_THREADS
+        from app.routers.model_runtime import load_model_runtime
+
+        threads = SUMMARY_INTRA_OP_THREADS or max(1, (os.cpu_count() or 1) // self.num_workers)
+        load_model_runtime().backend.limit_threads(threads)
+
+    def _handle_ready(self, data: bytes):
+        for line in data.decode().split():
+            pid = int(line)
+            if pid not in self.workers or pid in self.ready:
+                continue
+            self.ready.add(pid)
+            memory = process_memory_mb(pid)
+            logger.info("워커 %d 준비 완료 (fork 후 %.2f초, RSS %.0f MB, 고유 메모리 %.0f MB)",
+                        pid, time.perf_counter() - self.workers[pid],
+                        memory.get("rss_mb", 0.0), memory.get("uss_mb", 0.0))
+            if len(self.ready) == self.num_workers:
+                if self.ready_file:
+                    with open(self.ready_file, "w") as f:
+                        f.write(f"{os.getpid()}\n")
+                logger.info("워커 %d개 준비 완료 (시작부터 %.2f초) - http://%s:%d",
+                            self.num_workers, time.perf_counter() - self.started, self.host, self.port)
+
+    def _reap(self):
+        from prometheus_client import multiprocess
+
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            forked_at = self.workers.pop(pid, None)
+            self.ready.discard(pid)
+            # 죽은 워커의 게이지 값(livesum)이 합계에 남지 않도록 정리
+            multiprocess.mark_process_dead(pid)
+            if not self.stopping:
+                self._schedule_respawn(pid, status, forked_at)
+
+    def _schedule_respawn(self, pid: int, status: int, forked_at: float):
+        now = time.perf_counter()
+        if forked_at is not None and now - forked_at >= SERVE_MIN_UPTIME:
+            self.crashes = 0
+        else:
+            self.crashes += 1
+        exit_code = os.waitstatus_to_exitcode(status)
+        if self.crashes > SERVE_CRASH_LIMIT:
+            logger.error("워커가 연속 %d번 시작 직후 종료되어 서버를 멈춥니다 (마지막 워커 %d, 상태 %s)",
+                         self.crashes, pid, exit_code)
+            self.stopping = True
+            self.exit_code = 1
+            return
+        delay = 0.0 if self.crashes == 0 else min(SERVE_RESTART_BACKOFF_MAX,
+                                                  SERVE_RESTART_BACKOFF * 2 ** (self.crashes - 1))
+        logger.warning("워커 %d가 종료되어 %.1f초 뒤 다시 시작합니다 (상태 %s)", pid, delay, exit_code)
+        self._respawn_at.append(now + delay)
+
+    def _respawn_due(self):
+        now = time.perf_counter()
+        due = [at for at in self._respawn_at if at <= now]
+        self._respawn_at = [at for at in self._respawn_at if at > now]
+        for _ in due:
+            self.spawn()
+
+    def _stop(self, signum, _frame):
+        self.stopping = True
+
+    def shutdown(self):
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + SERVE_GRACEFUL_TIMEOUT
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            logger.warning("워커 %d가 제시간에 끝나지 않아 강제 종료합니다", pid)
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        if self.ready_file and os.path.exists(self.ready_file):
+            os.remove(self.ready_file)
+        self.sock.close()
+        if self.metrics_dir is not None:
+            shutil.rmtree(self.metrics_dir, ignore_errors=True)
+
+    def run(self) -> int:
+        self.prepare_metrics_dir()
+        self.preload()
+        self.bind()
+        self._ready_read, self._ready_write = os.pipe()
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for _ in range(self.num_workers):
+            self.spawn()
+        try:
+            while not self.stopping:
+                try:
+                    readable, _, _ = select.select([self._ready_read], [], [], 0.5)
+                except InterruptedError:
+                    continue
+                if readable:
+                    self._handle_ready(os.read(self._ready_read, 4096))
+                self._reap()
+                if not self.stopping:
+                    self._respawn_due()
+        finally:
+            logger.info("워커 %d개를 종료합니다", len(self.workers))
+            self.shutdown()
+        return self.exit_code
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="모델을 공유하는 여러 uvicorn 워커로 앱을 실행합니다.")
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    parser.add_argument("--ready-file", help="모든 워커가 준비되면 만들 파일 (readiness probe용, 종료 시 삭제)")
+    parser.add_argument("--log-level", default="warning", help="uvicorn 로그 레벨")
+    args = parser.parse_args(argv)
+
+    return PreforkServer(args.host, args.port, args.workers, args.ready_file, args.log_level).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
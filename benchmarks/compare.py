@@ -0,0 +1,71 @@
+# compare.py
+# 두 벤치마크 결과 JSON을 비교해 느려진 항목을 보여줍니다.
+#
+#   python -m benchmarks.compare benchmarks/results/이전.json benchmarks/results/이번.json --threshold 0.1
+# threshold(비율)보다 나빠진 항목이 있으면 종료 코드 1을 반환합니다.
+import argparse
+import json
+import sys
+
+# 값이 클수록 좋은 지표 (나머지 시간 지표는 작을수록 좋음)
+HIGHER_IS_BETTER = ("articles_per_s",)
+
+
+def flatten(result: dict) -> dict:
+    """비교할 지표만 '단계.길이.이름' 키로 펼칩니다."""
+    metrics = {}
+    for size, size_result in result.get("stages", {}).items():
+        for stage, stats in size_result["stages"].items():
+            metrics[f"stages.{size}.{stage}.mean_ms"] = stats["mean_ms"]
+        metrics[f"stages.{size}.total_mean_ms"] = size_result["total_mean_ms"]
+    e2e = result.get("e2e")
+    if e2e:
+        for name in ("p50_ms", "p95_ms", "articles_per_s"):
+            metrics[f"e2e.{name}"] = e2e[name]
+    return metrics
+
+
+def compare(old: dict, new: dict, threshold: float, min_ms: float = 1.0) -> list:
+    """
+    (지표, 이전 값, 이번 값, 변화율, 느려짐 여부) 목록. 변화율은 양수일수록 나빠진 것입니다.
+    시간 지표는 차이가 min_ms보다 작으면 측정 잡음으로 보고 느려짐으로 표시하지 않습니다.
+    """
+    old_metrics, new_metrics = flatten(old), flatten(new)
+    rows = []
+    for key in old_metrics.keys() & new_metrics.keys():
+        before, after = old_metrics[key], new_metrics[key]
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        if key.endswith(HIGHER_IS_BETTER):
+            change = -change
+        regressed = change > threshold
+        if key.endswith("_ms") and abs(after - before) < min_ms:
+            regressed = False
+        rows.append((key, before, after, change, regressed))
+    return sorted(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="두 벤치마크 결과를 비교합니다.")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.1, help="이 비율보다 나빠지면 실패로 표시 (기본 10%%)")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="이보다 작은 시간 차이(ms)는 무시")
+    args = parser.parse_args(argv)
+
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"{old['environment'].get('commit')} -> {new['environment'].get('commit')}")
+    rows = compare(old, new, args.threshold, args.min_ms)
+    for key, before, after, change, regressed in rows:
+        mark = "  <- 느려짐" if regressed else ""
+        print(f"{key:<40} {before:10.2f} {after:10.2f} {change:+8.1%}{mark}")
+    return 1 if any(row[4] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+# fixture_server.py
+# 저장해 둔 YTN 기사 HTML을 돌려주는 로컬 HTTP 서버 (벤치마크 중 실제 YTN에 접속하지 않도록)
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# 기사 길이별 픽스처와 YTN 카테고리 코드 (URL은 /_ln/{코드}_{길이} 형태)
+ARTICLE_SIZES = {"short": "0101", "medium": "0102", "long": "0103"}
+
+# 인기 뉴스 스냅샷이 외부 RSS에 접속하지 않도록 돌려주는 RSS
+RSS_TEXT = ("<rss><channel>"
+            + "".join(f"<item><title>벤치마크 뉴스 {i}</title></item>" for i in range(10))
+            + "</channel></rss>")
+
+
+def load_fixtures(fixture_dir: str = FIXTURE_DIR) -> dict:
+    """길이 이름 -> HTML 문자열"""
+    fixtures = {}
+    for size in ARTICLE_SIZES:
+        with open(os.path.join(fixture_dir, f"ytn_{size}.html"), encoding="utf-8") as f:
+            fixtures[size] = f.read()
+    return fixtures
+
+
+class FixtureServer:
+    """
+    백그라운드 스레드에서 도는 픽스처 서버입니다.
+    /_ln/0101_short?n=3 처럼 마지막 '_' 뒤의 길이 이름으로 픽스처를 고르고 쿼리는 무시합니다.
+    """
+
+    def __init__(self, fixture_dir: str = FIXTURE_DIR, host: str = "127.0.0.1", port: int = 0):
+        pages = {size: html.encode("utf-8") for size, html in load_fixtures(fixture_dir).items()}
+        rss = RSS_TEXT.encode("utf-8")
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if path == "/rss":
+                    self._send(200, "application/xml", rss)
+                    return
+                body = pages.get(path.rsplit("_", 1)[-1])
+                if body is None:
+                    self._send(404, "text/plain", b"not found")
+                else:
+                    self._send(200, "text/html; charset=utf-8", body)
+
+            def _send(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def article_url(self, size: str, query: str = "") -> str:
+        url = f"{self.base_url}/_ln/{ARTICLE_SIZES[size]}_{size}"
+        return f"{url}?{query}" if query else url
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fixture-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,74 @@
+# random_model.py
+# 네트워크 없이 벤치마크를 돌리기 위한 무작위 초기화 KoBERT 형태 모델
+# 가중치는 의미가 없지만 층 수/hidden 크기/어휘 수가 같아서 연산량은 실제 모델과 비슷합니다.
+import json
+import os
+
+from .fixture_server import FIXTURE_DIR, load_fixtures
+
+# monologg/kobert 와 같은 구조 (vocab 8002, hidden 768, 12층)
+KOBERT_CONFIG = {
+    "vocab_size": 8002,
+    "hidden_size": 768,
+    "num_hidden_layers": 12,
+    "num_attention_heads": 12,
+    "intermediate_size": 3072,
+    "max_position_embeddings": 512,
+    "type_vocab_size": 2,
+}
+
+# CI처럼 빠르게 돌려야 할 때 쓰는 작은 모델 (구조는 같고 크기만 줄임)
+TINY_CONFIG = dict(KOBERT_CONFIG, hidden_size=128, num_hidden_layers=2,
+                   num_attention_heads=2, intermediate_size=512)
+
+PRESETS = {"kobert": KOBERT_CONFIG, "tiny": TINY_CONFIG}
+
+# 만든 모델을 저장해 두는 폴더 (실행할 때마다 다시 만들지 않음)
+MODEL_CACHE_DIR = os.path.join(os.path.dirname(__file__), ".model")
+
+SPECIAL_TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+
+
+def build_vocab(texts, vocab_size: int) -> list:
+    """
+    픽스처에 나오는 모든 글자를 단어 첫 글자/이어지는 글자(##) 토큰으로 넣은 어휘를 만듭니다.
+    남는 자리는 [unusedN] 토큰으로 채워 임베딩 행렬 크기를 실제 모델과 맞춥니다.
+    """
+    chars = sorted({ch for text in texts for ch in text if not ch.isspace()})
+    vocab = SPECIAL_TOKENS + chars + [f"##{ch}" for ch in chars]
+    if len(vocab) > vocab_size:
+        raise ValueError(f"픽스처 글자 수({len(vocab)})가 어휘 크기({vocab_size})보다 많습니다.")
+    vocab += [f"[unused{i}]" for i in range(vocab_size - len(vocab))]
+    return vocab
+
+
+def build_random_model(preset: str = "tiny", seed: int = 0, model_dir: str = None) -> str:
+    """
+    preset 구조의 무작위 모델과 토크나이저를 save_pretrained로 저장하고 폴더 경로를 반환합니다.
+    같은 preset/seed로 이미 만든 모델이 있으면 그대로 사용합니다. (SUMMARY_MODEL_NAME에 지정)
+    """
+    config_values = PRESETS[preset]
+    model_dir = model_dir or os.path.join(MODEL_CACHE_DIR, f"{preset}-seed{seed}")
+    marker_path = os.path.join(model_dir, "benchmark.json")
+    marker = {"preset": preset, "seed": seed, "config": config_values}
+    if os.path.exists(marker_path):
+        with open(marker_path, encoding="utf-8") as f:
+            if json.load(f) == marker:
+                return model_dir
+
+    import torch
+    from transformers import BertConfig, BertModel, BertTokenizer
+
+    os.makedirs(model_dir, exist_ok=True)
+    texts = [html for html in load_fixtures(FIXTURE_DIR).values()]
+    vocab_path = os.path.join(model_dir, "vocab.txt")
+    with open(vocab_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(build_vocab(texts, config_values["vocab_size"])) + "\n")
+    BertTokenizer(vocab_path, do_lower_case=False).save_pretrained(model_dir)
+
+    torch.manual_seed(seed)
+    BertModel(BertConfig(**config_values)).save_pretrained(model_dir)
+    with open(marker_path, "w", encoding="utf-8") as f:
+        json.dump(marker, f)
+    print(f"무작위 '{preset}' 모델을 '{model_dir}'에 저장했습니다.")
+    return model_dir
@@ -0,0 +1,369 @@
+# run.py
+# 요약 파이프라인(가져오기 -> 추출 -> 문장 분리 -> 임베딩 -> 점수 계산) 오프라인 벤치마크
+#
+#   python -m benchmarks.run                       # KoBERT 크기 무작위 모델
+#   python -m benchmarks.run --preset tiny         # CI용 작은 모델
+#   python -m benchmarks.compare 이전.json 이번.json  # 커밋 간 결과 비교
+#
+# 저장해 둔 YTN 기사 HTML(짧은/중간/긴 기사)을 로컬 서버로 돌려주므로 네트워크가 필요 없습니다.
+# 결과는 benchmarks/results/ 아래 JSON 파일로 저장됩니다.
+import argparse
+import asyncio
+import functools
+import gc
+import json
+import os
+import platform
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from .fixture_server import ARTICLE_SIZES, FixtureServer
+from .random_model import PRESETS, build_random_model
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+class PeakRSS:
+    """
+    with 블록 동안 프로세스의 RSS 최댓값(MB)을 샘플링합니다.
+    psutil이 없으면 현재 프로세스의 ru_maxrss(프로세스 시작 이후 최댓값)로 대신합니다.
+    """
+
+    def __init__(self, pid: int = None, interval: float = 0.005):
+        self.pid = pid or os.getpid()
+        self.interval = interval
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self, process):
+        peak = 0
+        while True:
+            try:
+                peak = max(peak, process.memory_info().rss)
+            except psutil.Error:
+                break
+            self.peak_mb = peak / (1024 * 1024)
+            if self._stop.wait(self.interval):
+                break
+
+    def __enter__(self):
+        if psutil is not None:
+            self._thread = threading.Thread(target=self._sample, args=(psutil.Process(self.pid),), daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+        elif self.pid == os.getpid():
+            # 리눅스에서 ru_maxrss 단위는 KB
+            self.peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values, q: float) -> float:
+    """정렬된 값에서 nearest-rank 방식의 q 백분위수"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def timing_stats(seconds, articles: int = 1, sentences: int = 0) -> dict:
+    """반복 측정한 시간(초) 목록을 ms 통계와 처리량으로 정리합니다."""
+    mean = statistics.fmean(seconds)
+    return {
+        "iterations": len(seconds),
+        "mean_ms": mean * 1000,
+        "p50_ms": percentile(seconds, 50) * 1000,
+        "p95_ms": percentile(seconds, 95) * 1000,
+        "min_ms": min(seconds) * 1000,
+        "articles_per_s": articles / mean if mean else None,
+        "sentences_per_s": sentences / mean if mean and sentences else None,
+    }
+
+
+# 문장 분리 결과를 입력 문자열 기준으로 기억하는 kss/pecab의 lru_cache
+# (사전 파일 로드, 단어별 사전 항목처럼 기사와 무관하게 재사용되는 캐시는 제외)
+_SPLIT_CACHE_MODULES = ("kss.", "pecab.")
+_SPLIT_CACHE_KEEP = ("load_arrow", "create_entries")
+
+
+def clear_split_caches():
+    """
+    kss는 같은 문장을 다시 나눌 때 내부 캐시 결과를 돌려주므로,
+    처음 보는 기사를 나누는 비용을 재려면 측정 전에 캐시를 비워야 합니다.
+    """
+    for obj in gc.get_objects():
+        if type(obj) is not functools._lru_cache_wrapper:
+            continue
+        module = getattr(obj, "__module__", None) or ""
+        if module.startswith(_SPLIT_CACHE_MODULES) and obj.__name__ not in _SPLIT_CACHE_KEEP:
+            obj.cache_clear()
+
+
+def measure(fn, repeat: int, sentences: int, warmup: int = 1, setup=None) -> dict:
+    """
+    fn을 warmup번 실행한 뒤 repeat번 시간을 재고, 그동안의 최대 RSS를 함께 기록합니다.
+    setup이 있으면 매 실행 전에 (측정 시간 밖에서) 호출합니다.
+    """
+    for _ in range(warmup):
+        fn()
+    seconds = []
+    with PeakRSS() as rss:
+        for _ in range(repeat):
+            if setup is not None:
+                setup()
+            started = time.perf_counter()
+            fn()
+            seconds.append(time.perf_counter() - started)
+    stats = timing_stats(seconds, sentences=sentences)
+    stats["peak_rss_mb"] = rss.peak_mb
+    return stats
+
+
+def bench_stages(server: FixtureServer, sizes, repeat: int, top_n: int) -> dict:
+    """
+    기사 길이별로 각 단계를 따로 측정합니다.
+    - fetch: 로컬 서버에서 HTML 가져오기 (fetch_article_html_sync)
+    - extract: 제목/본문/카테고리 추출 (extract_article, 예전 get_ytn_article_data)
+    - split: kss.split_sentences (kss 내부 캐시를 비우고 측정)
+    - embed: 모델 임베딩 (캐시/배처를 거치지 않고 runtime.encode 직접 호출)
+    - score: 선택한 점수 계산기의 rank
+    """
+    import kss
+    from app.routers.extractors import extract_article
+    from app.routers.model_runtime import get_model_runtime
+    from app.routers.processor import fetch_article_html_sync
+    from app.routers.scorers import get_scorer
+
+    runtime = get_model_runtime()
+    scorer = get_scorer()
+    results = {}
+    for size in sizes:
+        url = server.article_url(size)
+        html = fetch_article_html_sync(url)
+        article = extract_article(url, html)
+        body = article["본문"]
+        sentences = kss.split_sentences(body)
+        embeddings = runtime.encode(sentences)
+
+        stages = {
+            "fetch": lambda: fetch_article_html_sync(url),
+            "extract": lambda: extract_article(url, html),
+            "split": lambda: kss.split_sentences(body),
+            "embed": lambda: runtime.encode(sentences),
+            "score": lambda: scorer.rank(embeddings, top_n),
+        }
+        setups = {"split": clear_split_caches}
+        stage_results = {}
+        for name, fn in stages.items():
+            stage_results[name] = measure(fn, repeat, len(sentences), setup=setups.get(name))
+            print(f"  {size:<6} {name:<8} {stage_results[name]['mean_ms']:9.2f} ms")
+        results[size] = {
+            "html_bytes": len(html.encode("utf-8")),
+            "body_chars": len(body),
+            "sentences": len(sentences),
+            "total_mean_ms": sum(stage["mean_ms"] for stage in stage_results.values()),
+            "stages": stage_results,
+        }
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_ready(base_url: str, timeout: float) -> float:
+    """/api/ready가 200을 돌려줄 때까지 기다리고 걸린 시간(초)을 반환합니다."""
+    import httpx
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() - started < timeout:
+            try:
+                response = await client.get(f"{base_url}/api/ready")
+                if response.status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise TimeoutError(f"{timeout}초 안에 서버가 준비되지 않았습니다.")
+
+
+async def _load(base_url: str, urls, concurrency: int, top_n: int) -> dict:
+    """concurrency개의 클라이언트가 urls를 나눠 /api/summarize로 보내고 지연 시간을 집계합니다."""
+    import httpx
+
+    latencies, statuses, cache = [], Counter(), Counter()
+    pending = iter(urls)
+
+    async def client_loop(client):
+        for url in pending:
+            started = time.perf_counter()
+            try:
+                response = await client.post(f"{base_url}/api/summarize", json={"url": url, "top_n": top_n})
+                status = str(response.status_code)
+                if response.status_code == 200:
+                    cache[response.json().get("cache", "miss")] += 1
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=300, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    stats = timing_stats(latencies, articles=len(latencies))
+    # 동시 요청이므로 처리량은 평균 지연이 아니라 전체 경과 시간으로 계산
+    stats["articles_per_s"] = len(latencies) / elapsed if elapsed else None
+    stats.pop("sentences_per_s")
+    stats.update({
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "elapsed_s": elapsed,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "status_codes": dict(statuses),
+        "cache": dict(cache),
+    })
+    return stats
+
+
+def bench_e2e(server: FixtureServer, model_name: str, sizes, requests: int, concurrency: int,
+              mode: str, top_n: int, ready_timeout: float = 300) -> dict:
+    """
+    uvicorn으로 앱을 별도 프로세스에 띄우고 /api/summarize에 부하를 줍니다.
+    - cold: 요청마다 다른 URL을 쓰고 요약/임베딩 캐시를 꺼서 매번 전체 파이프라인을 실행
+    - warm: 같은 URL을 반복해 캐시 적중 경로를 측정
+    """
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = dict(
+            os.environ,
+            SUMMARY_MODEL_NAME=model_name,
+            SUMMARY_DB_PATH=os.path.join(tmp_dir, "summaries.db"),
+            SUMMARY_CACHE_DB="",
+            EMBED_CACHE_DIR="",
+            TRENDING_RSS_URL=f"{server.base_url}/rss",
+        )
+        if mode == "cold":
+            env.update(SUMMARY_CACHE_MAX_ENTRIES="0", EMBED_CACHE_MEMORY_ENTRIES="0")
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app",
+             "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+            cwd=REPO_ROOT, env=env,
+        )
+        try:
+            startup_seconds = asyncio.run(_wait_ready(base_url, ready_timeout))
+            urls = [server.article_url(sizes[i % len(sizes)], f"n={i}" if mode == "cold" else "")
+                    for i in range(requests)]
+            with PeakRSS(process.pid) as rss:
+                stats = asyncio.run(_load(base_url, urls, concurrency, top_n))
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+    stats.update({"mode": mode, "startup_s": startup_seconds, "server_peak_rss_mb": rss.peak_mb})
+    return stats
+
+
+def _git_revision() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", "app"))}
+
+
+def environment_info(args, model_name: str) -> dict:
+    import torch
+    from app.routers.inference_backends import SUMMARY_BACKEND
+    from app.routers.model_runtime import get_model_runtime
+    from app.routers.scorers import SUMMARY_SCORER
+
+    return {
+        **_git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "torch": torch.__version__,
+        "model": model_name,
+        "preset": None if args.model else args.preset,
+        "backend": SUMMARY_BACKEND,
+        "scorer": SUMMARY_SCORER,
+        "top_n": args.top_n,
+        "repeat": args.repeat,
+        "model_load_s": get_model_runtime().load_seconds,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="요약 파이프라인 단계별/전체 성능을 오프라인으로 측정합니다.")
+    parser.add_argument("--preset", default="kobert", choices=sorted(PRESETS),
+                        help="무작위로 초기화할 모델 크기 (tiny는 CI용)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", help="무작위 모델 대신 사용할 모델 이름/경로 (예: monologg/kobert)")
+    parser.add_argument("--sizes", nargs="+", default=list(ARTICLE_SIZES), choices=list(ARTICLE_SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--e2e-requests", type=int, default=12)
+    parser.add_argument("--e2e-concurrency", type=int, default=4)
+    parser.add_argument("--e2e-mode", default="cold", choices=["cold", "warm"])
+    parser.add_argument("--skip-e2e", action="store_true")
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: benchmarks/results/<커밋>-<모델>.json)")
+    args = parser.parse_args(argv)
+
+    model_name = args.model or build_random_model(args.preset, seed=args.seed)
+    # app 모듈은 import 시점에 환경 변수를 읽으므로 import 전에 설정
+    os.environ["SUMMARY_MODEL_NAME"] = model_name
+    sys.path.insert(0, REPO_ROOT)
+
+    with FixtureServer() as server:
+        print("단계별 측정")
+        stages = bench_stages(server, args.sizes, args.repeat, args.top_n)
+        result = {"environment": environment_info(args, model_name), "stages": stages}
+        if not args.skip_e2e:
+            print(f"/api/summarize 부하 테스트 ({args.e2e_mode}, 요청 {args.e2e_requests}개, 동시 {args.e2e_concurrency})")
+            result["e2e"] = bench_e2e(server, model_name, args.sizes, args.e2e_requests,
+                                      args.e2e_concurrency, args.e2e_mode, args.top_n)
+            print(f"  p50 {result['e2e']['p50_ms']:.1f} ms, p95 {result['e2e']['p95_ms']:.1f} ms, "
+                  f"{result['e2e']['articles_per_s']:.2f} req/s")
+
+    output = args.output
+    if not output:
+        label = args.preset if not args.model else os.path.basename(args.model.rstrip("/"))
+        output = os.path.join(RESULTS_DIR, f"{result['environment']['commit'] or 'unknown'}-{label}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"결과를 '{output}'에 저장했습니다.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())